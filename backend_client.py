@@ -2,27 +2,45 @@ from __future__ import annotations
 
 import logging
 import os
-from typing import Any, Dict
+from typing import List
 
-import httpx
+from core.serialization import JSON_CONTENT_TYPE, Payload, encode, encode_batch, loads
+from http_transport import HttpTransport, get_transport
+from sinks import Sink
 
 logger = logging.getLogger(__name__)
 
+JSON_HEADERS = {"Content-Type": JSON_CONTENT_TYPE}
+# Statuses meaning "this backend has no batch endpoint" rather than a transient failure.
+BATCH_UNSUPPORTED_STATUSES = {404, 405, 501}
 
-class BackendClient:
+
+class BackendClient(Sink):
     """
-    HTTP client for the provided backend.
+    HTTP client for the provided backend, the default sink.
     """
 
-    def __init__(self, base_url: str | None = None, endpoint: str = "/test/save_news", timeout: int = 10) -> None:
+    name = "http"
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        endpoint: str = "/test/save_news",
+        timeout: int = 10,
+        transport: HttpTransport | None = None,
+        batch_endpoint: str | None = None,
+    ) -> None:
         self.base_url = (base_url or os.getenv("BACKEND_BASE_URL") or "http://localhost:8080").rstrip("/")
         self.endpoint = endpoint or "/test/save_news"
+        self.batch_endpoint = batch_endpoint
         self.timeout = timeout
-        self._client = httpx.AsyncClient(timeout=self.timeout)
+        self._transport = transport or get_transport()
+        # None -> not probed yet, False -> backend has no batch endpoint
+        self._batch_supported: bool | None = None if batch_endpoint else False
 
-    async def save_news(self, payload: Dict[str, Any]) -> bool | None:
+    async def save_news(self, payload: Payload) -> bool | None:
         """
-        Send news payload to backend.
+        Send news payload (a dict or pre-encoded JSON bytes) to backend.
 
         Returns:
             True  -> backend created the news item
@@ -31,7 +49,7 @@ class BackendClient:
         """
         url = f"{self.base_url}{self.endpoint}"
         try:
-            resp = await self._client.post(url, json=payload)
+            resp = await self._transport.post(url, content=encode(payload), headers=JSON_HEADERS, timeout=self.timeout)
         except Exception as exc:  # noqa: BLE001
             logger.warning("Backend request failed: %s", exc)
             return None
@@ -41,12 +59,94 @@ class BackendClient:
             return None
 
         try:
-            data = resp.json()
+            data = loads(resp.content)
         except Exception as exc:  # noqa: BLE001
             logger.warning("Backend response JSON decode failed: %s", exc)
             return None
 
         return bool(data.get("created", False))
 
+    @property
+    def batch_supported(self) -> bool | None:
+        """False once the backend is known to lack the batch endpoint, None until probed."""
+        return self._batch_supported
+
+    async def save_news_batch(self, payloads: List[Payload]) -> List[bool | None]:
+        """
+        Send several payloads, newest first, and return per-item results in order
+        (same values as `save_news`).
+
+        Uses the batch endpoint when the backend has one. Otherwise falls back
+        to single POSTs, which stop after the first created=false; the result
+        list is then shorter than `payloads`.
+        """
+        if not payloads:
+            return []
+        if self._batch_supported is not False:
+            results = await self._post_batch(payloads)
+            if results is not None:
+                return results
+        return await self._save_each(payloads)
+
+    async def _post_batch(self, payloads: List[Payload]) -> List[bool | None] | None:
+        """Returns None when the backend turns out not to support batching."""
+        url = f"{self.base_url}{self.batch_endpoint}"
+        failed: List[bool | None] = [None] * len(payloads)
+        try:
+            resp = await self._transport.post(
+                url, content=encode_batch(payloads), headers=JSON_HEADERS, timeout=self.timeout
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Backend batch request failed: %s", exc)
+            return failed
+
+        if resp.status_code in BATCH_UNSUPPORTED_STATUSES:
+            logger.info(
+                "Backend batch endpoint %s returned %s, falling back to single requests",
+                self.batch_endpoint,
+                resp.status_code,
+            )
+            self._batch_supported = False
+            return None
+
+        if resp.status_code != 200:
+            logger.warning("Backend batch returned status %s, continuing parsing", resp.status_code)
+            return failed
+
+        try:
+            data = loads(resp.content)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Backend batch response JSON decode failed: %s", exc)
+            return failed
+
+        entries = data.get("results") if isinstance(data, dict) else data
+        if not isinstance(entries, list) or len(entries) != len(payloads):
+            logger.warning("Backend batch response does not match the request, continuing parsing")
+            return failed
+
+        self._batch_supported = True
+        results: List[bool | None] = []
+        for entry in entries:
+            if isinstance(entry, dict):
+                if entry.get("error"):
+                    results.append(None)
+                else:
+                    results.append(bool(entry.get("created", False)))
+            elif isinstance(entry, bool):
+                results.append(entry)
+            else:
+                results.append(None)
+        return results
+
+    async def _save_each(self, payloads: List[Payload]) -> List[bool | None]:
+        results: List[bool | None] = []
+        for payload in payloads:
+            result = await self.save_news(payload)
+            results.append(result)
+            if result is False:
+                break
+        return results
+
     async def close(self) -> None:
-        await self._client.aclose()
+        # The pooled transport is shared with the fetchers and closed by close_transport().
+        return None
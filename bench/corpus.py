@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+from xml.sax.saxutils import escape
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+BASE_PLACEHOLDER = b"{base}"
+FIXTURES = ("rss_ria.xml", "atom_habr.xml", "gnews_top.json", "article_ria.html")
+PATHOLOGICAL_KINDS = ("deep", "unclosed", "script", "images")
+
+_FILLER = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+    "Съешь же ещё этих мягких французских булок, да выпей чаю. "
+)
+
+
+def load_fixture(name: str, base_url: str) -> bytes:
+    """Recorded payload with `{base}` pointing at the mock server."""
+    return (CORPUS_DIR / name).read_bytes().replace(BASE_PLACEHOLDER, base_url.encode("ascii"))
+
+
+def item_title(feed: str, index: int) -> str:
+    return f"{feed}: новость номер {index}"
+
+
+def generate_rss(
+    feed: str,
+    base_url: str,
+    items: int,
+    target_bytes: int = 0,
+    empty_text_every: int = 3,
+    newest: datetime | None = None,
+) -> Tuple[bytes, List[str]]:
+    """
+    Synthetic RSS 2.0 feed, newest item first. Every `empty_text_every`-th item
+    has no description, so delivery has to fetch its article page. With
+    `target_bytes` the descriptions are padded until the feed reaches that size.
+
+    Returns the body and the item titles in feed order.
+    """
+    newest = newest or datetime(2026, 2, 23, 12, 0, tzinfo=timezone.utc)
+    head = (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"><channel>\n'
+        f"<title>{escape(feed)}</title><link>{base_url}/</link><description>bench</description>\n"
+    )
+    tail = "</channel></rss>\n"
+    overhead = 400  # markup per item, roughly
+    padding = 0
+    if target_bytes and items:
+        padding = max(0, (target_bytes - len(head) - len(tail)) // items - overhead)
+    filler = (_FILLER * (padding // len(_FILLER) + 1))[:padding] if padding else ""
+
+    parts = [head]
+    titles: List[str] = []
+    for index in range(items):
+        title = item_title(feed, index)
+        titles.append(title)
+        published = format_datetime(newest - timedelta(minutes=index))
+        link = f"{base_url}/articles/{feed}-{index}"
+        if empty_text_every and index % empty_text_every == empty_text_every - 1:
+            description = ""
+        else:
+            description = escape(f"<p>Краткое описание новости {index}.</p><p>{filler}</p>")
+        parts.append(
+            f"<item><title>{escape(title)}</title><link>{link}</link><guid>{link}</guid>"
+            f"<pubDate>{published}</pubDate><category>bench</category><category>{escape(feed)}</category>"
+            f'<media:content url="{base_url}/static/{feed}-{index}.jpg" type="image/jpeg"/>'
+            f"<description>{description}</description></item>\n"
+        )
+    parts.append(tail)
+    return "".join(parts).encode("utf-8"), titles
+
+
+def pathological_html(kind: str) -> bytes:
+    """Article pages that are expensive or awkward to parse."""
+    if kind == "deep":  # very deep nesting, text at the bottom
+        depth = 5000
+        body = "<div>" * depth + "<p>Текст на самом дне документа.</p>" + "</div>" * depth
+    elif kind == "unclosed":  # tens of thousands of <p> that are never closed
+        body = "<article>" + "".join(f"<p>Абзац {i} без закрывающего тега" for i in range(20000)) + "</article>"
+    elif kind == "script":  # megabytes of inline script before the content
+        body = "<script>var x = '" + "a" * (2 * 1024 * 1024) + "';</script><article><p>Короткий текст.</p></article>"
+    elif kind == "images":  # thousands of images and huge attributes
+        body = "<main>" + "".join(
+            f'<img src="/static/{i}.jpg" alt="{"x" * 500}" class="{"c " * 50}">' for i in range(5000)
+        ) + "<p>Подпись к галерее.</p></main>"
+    else:
+        raise ValueError(f"Unknown pathological kind: {kind}")
+    return f"<!DOCTYPE html><html><head><title>{kind}</title></head><body>{body}</body></html>".encode("utf-8")
+
+
+def pathological_pages() -> Dict[str, bytes]:
+    return {kind: pathological_html(kind) for kind in PATHOLOGICAL_KINDS}
@@ -0,0 +1,101 @@
+"""
+Microbenchmark of the per-item representation and backend payload encoding:
+memory held by N NewsItems and the time to encode them for single and batch
+POSTs, compared with the previous path (payload dict + stdlib json, as
+`httpx(json=...)` does).
+
+    python -m bench.encode [--items 20000] [--batch 20]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+from bench.corpus import item_title
+from core import serialization
+from core.models import NewsItem
+from core.serialization import build_payload, encode_batch, encode_payload
+
+
+def make_items(count: int) -> List[NewsItem]:
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        NewsItem(
+            header=item_title("bench", index),
+            text=f"Текст новости {index}. " * 40,
+            date=start + timedelta(minutes=index),
+            # built per item, as the normalizer does: equal strings, separate objects
+            hashtags=["".join(["поли", "тика"]), "".join(["мир"])],
+            source_name="".join(["bench-", "source"]),
+            url=f"https://example.com/news/{index}",
+            image_urls=[f"https://example.com/img/{index}.jpg"],
+        )
+        for index in range(count)
+    ]
+
+
+def measure_items(count: int) -> float:
+    """Bytes allocated per NewsItem (strings included)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = make_items(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return (after - before) / count
+
+
+def timed(fn: Callable[[], object], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def legacy_dumps(obj: object) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=20)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    chunks = [items[i : i + args.batch] for i in range(0, len(items), args.batch)]
+
+    def legacy_single() -> None:
+        for item in items:
+            legacy_dumps(build_payload(item))
+
+    def legacy_batch() -> None:
+        for chunk in chunks:
+            legacy_dumps([build_payload(item) for item in chunk])
+
+    def fast_single() -> None:
+        for item in items:
+            encode_payload(item)
+
+    def fast_batch() -> None:
+        for chunk in chunks:
+            encode_batch([encode_payload(item) for item in chunk])
+
+    backend = "orjson" if serialization.orjson is not None else "json"
+    print(f"NewsItem: {measure_items(args.items):.0f} bytes/item allocated")
+    for name, legacy, fast in (("single", legacy_single, fast_single), ("batch", legacy_batch, fast_batch)):
+        old, new = timed(legacy), timed(fast)
+        print(
+            f"encode {name:<6} dict+json {old * 1e6 / len(items):6.2f} us/item   "
+            f"{backend} bytes {new * 1e6 / len(items):6.2f} us/item   x{old / new:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
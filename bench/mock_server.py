@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from bench.corpus import PATHOLOGICAL_KINDS, generate_rss, load_fixture, pathological_pages
+
+logger = logging.getLogger(__name__)
+
+FIXTURE_FEEDS = {"ria": "rss_ria.xml", "habr": "atom_habr.xml"}
+
+
+@dataclass
+class BenchSpec:
+    """What the mock server generates and how the stand-in backend answers."""
+
+    feeds: int = 8  # generated feeds for the full-cycle scenario
+    items: int = 50  # items per generated feed
+    large_feed_mb: float = 4.9  # stays under rss_parser.MAX_RSS_SIZE_BYTES
+    large_feed_items: int = 2000
+    empty_text_every: int = 3  # every N-th item needs its article page
+    pathological_every: int = 10  # every N-th article page is pathological (0 = never)
+    backend_latency_ms: float = 5.0
+    known_ratio: float = 0.0  # oldest share of every generated feed the backend already has
+    batch: bool = True  # serve the batch endpoint (False answers 404)
+
+    def generated_feeds(self) -> List[str]:
+        return [f"gen-{index}" for index in range(self.feeds)]
+
+
+class _Routes:
+    def __init__(self, spec: BenchSpec, base_url: str) -> None:
+        self.spec = spec
+        self.static: Dict[str, Tuple[str, bytes]] = {}
+        self.known: Set[str] = set()
+        self.stats = {"posts": 0, "batch_posts": 0, "created": 0, "duplicates": 0, "pages": 0}
+
+        feeds = {name: (spec.items, 0) for name in spec.generated_feeds()}
+        feeds["large"] = (spec.large_feed_items, int(spec.large_feed_mb * 1024 * 1024))
+        for name, (items, target) in feeds.items():
+            body, titles = generate_rss(name, base_url, items, target, spec.empty_text_every)
+            self.static[f"/feeds/{name}.xml"] = ("application/rss+xml; charset=utf-8", body)
+            known = int(len(titles) * spec.known_ratio)
+            if known:
+                self.known.update(titles[-known:])
+        for name, fixture in FIXTURE_FEEDS.items():
+            self.static[f"/feeds/{name}.xml"] = ("application/xml", load_fixture(fixture, base_url))
+        self.static["/gnews"] = ("application/json", load_fixture("gnews_top.json", base_url))
+        self.article = load_fixture("article_ria.html", base_url)
+        self.pathological = pathological_pages()
+
+    def etag(self, body: bytes) -> str:
+        return '"' + hashlib.md5(body).hexdigest() + '"'
+
+    def get(self, path: str, headers: Dict[str, str]) -> Tuple[int, str, bytes, Dict[str, str]]:
+        if path in self.static:
+            content_type, body = self.static[path]
+            etag = self.etag(body)
+            if headers.get("if-none-match") == etag:
+                return 304, content_type, b"", {"ETag": etag}
+            return 200, content_type, body, {"ETag": etag}
+        if path.startswith("/articles/"):
+            self.stats["pages"] += 1
+            number = path.rsplit("-", 1)[-1]
+            every = self.spec.pathological_every
+            body = self.article
+            if every and number.isdigit() and int(number) % every == every - 1:
+                body = self.pathological[PATHOLOGICAL_KINDS[(int(number) // every) % len(PATHOLOGICAL_KINDS)]]
+            etag = self.etag(body)
+            if headers.get("if-none-match") == etag:
+                return 304, "text/html; charset=utf-8", b"", {"ETag": etag}
+            return 200, "text/html; charset=utf-8", body, {"ETag": etag}
+        if path == "/stats":
+            return 200, "application/json", json.dumps(self.stats).encode(), {}
+        return 404, "text/plain", b"not found", {}
+
+    def save(self, payload: Dict[str, Any]) -> bool:
+        title = payload.get("title") or ""
+        if title in self.known:
+            self.stats["duplicates"] += 1
+            return False
+        self.known.add(title)
+        self.stats["created"] += 1
+        return True
+
+    async def post(self, path: str, body: bytes) -> Tuple[int, str, bytes, Dict[str, str]]:
+        if self.spec.backend_latency_ms:
+            await asyncio.sleep(self.spec.backend_latency_ms / 1000)
+        try:
+            data = json.loads(body or b"null")
+        except ValueError:
+            return 400, "application/json", b'{"error": "bad json"}', {}
+        if path == "/test/save_news":
+            self.stats["posts"] += 1
+            return 200, "application/json", json.dumps({"created": self.save(data)}).encode(), {}
+        if path == "/test/save_news_batch" and self.spec.batch:
+            self.stats["batch_posts"] += 1
+            results = [{"created": self.save(payload)} for payload in data]
+            return 200, "application/json", json.dumps({"results": results}).encode(), {}
+        return 404, "application/json", b'{"error": "not found"}', {}
+
+
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found"}
+
+
+async def _handle(routes: _Routes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:  # keep-alive
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers: Dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+            length = int(headers.get("content-length") or 0)
+            body = await reader.readexactly(length) if length else b""
+            path = urlsplit(target).path
+            if method == "POST":
+                status, content_type, payload, extra = await routes.post(path, body)
+            else:
+                status, content_type, payload, extra = routes.get(path, headers)
+            head = [f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}", f"Content-Type: {content_type}"]
+            head += [f"{key}: {value}" for key, value in extra.items()]
+            head.append(f"Content-Length: {len(payload)}")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(spec: BenchSpec, host: str = "127.0.0.1", port: int = 0, ready: Any = None) -> None:
+    loop = asyncio.get_running_loop()
+    holder: Dict[str, _Routes] = {}
+    server = await asyncio.start_server(lambda r, w: _handle(holder["routes"], r, w), host, port)
+    bound = server.sockets[0].getsockname()[1]
+    holder["routes"] = await loop.run_in_executor(None, _Routes, spec, f"http://{host}:{bound}")
+    if ready is not None:
+        ready.put(bound)
+    async with server:
+        await server.serve_forever()
+
+
+def _serve_process(spec_dict: Dict[str, Any], ready: Any) -> None:
+    asyncio.run(serve(BenchSpec(**spec_dict), ready=ready))
+
+
+def start_in_process(spec: BenchSpec, timeout: float = 60) -> Tuple[multiprocessing.Process, int]:
+    """
+    Run the mock server in a child process so its CPU time and memory stay out
+    of the parser's measurements. Returns the process and the bound port.
+    """
+    ready: multiprocessing.Queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve_process, args=(asdict(spec), ready), daemon=True)
+    process.start()
+    port: Optional[int] = ready.get(timeout=timeout)
+    return process, int(port)  # type: ignore[arg-type]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the benchmark corpus and a stand-in backend")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--known-ratio", type=float, default=0.0)
+    parser.add_argument("--no-batch", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    spec = BenchSpec(backend_latency_ms=args.latency_ms, known_ratio=args.known_ratio, batch=not args.no_batch)
+    logger.info("Serving on http://127.0.0.1:%s", args.port)
+    asyncio.run(serve(spec, port=args.port))
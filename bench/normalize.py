@@ -0,0 +1,112 @@
+"""
+Microbenchmark of entry normalization: per-entry cost of the previous
+multi-pass normalizer (tag strip, unescape, strip, then truncate; list
+dedupe of tags) against the windowed one, on a typical feed
+and on entries with a multi-megabyte `content:encoded` body.
+
+    python -m bench.normalize [--entries 2000] [--huge-mb 4]
+"""
+from __future__ import annotations
+
+import argparse
+import html
+import re
+import time
+from typing import Any, Callable, Dict, List
+
+from bench.corpus import _FILLER, item_title
+from core import normalizer
+from core.models import NewsItem
+from core.normalizer import normalize_entries
+
+
+def legacy_header(title: str) -> str:
+    title = html.unescape(title or "").strip()
+    title = re.sub(r"\s+", " ", title)
+    return title[: normalizer.HEADER_MAX_LEN]
+
+
+def legacy_text(raw: str) -> str:
+    cleaned = re.sub(r"<[^>]+>", " ", raw or "")
+    cleaned = html.unescape(cleaned).strip()
+    return cleaned[: normalizer.TEXT_MAX_LEN]
+
+
+def legacy_hashtags(entry: Dict[str, Any]) -> List[str]:
+    normalized: List[str] = []
+    for tag in entry.get("tags", []) or []:
+        term = (tag.get("term") or "").strip().lower()
+        if term and term not in normalized:
+            normalized.append(term)
+        if len(normalized) >= normalizer.HASHTAG_MAX:
+            break
+    return normalized
+
+
+def legacy_entries(entries: List[Dict[str, Any]], source_name: str) -> List[NewsItem]:
+    """The previous normalize_entry; date and image extraction are shared with the new one."""
+    return [
+        NewsItem(
+            header=legacy_header(entry.get("title", "")),
+            text=legacy_text(normalizer._extract_text(entry)),
+            date=normalizer._parse_datetime(entry),
+            hashtags=legacy_hashtags(entry),
+            source_name=source_name,
+            url=entry.get("link", ""),
+            image_urls=normalizer._extract_images(entry),
+        )
+        for entry in entries
+    ]
+
+
+def make_entry(index: int, body: str) -> Dict[str, Any]:
+    return {
+        "title": f"  {item_title('bench', index)} &laquo;цитата&raquo;\n",
+        "link": f"https://example.com/news/{index}",
+        "published_parsed": time.gmtime(1_700_000_000 - index * 60),
+        "tags": [{"term": term} for term in ("Политика", "Мир", "политика ", "Экономика", "Мир")],
+        "summary": body,
+        "media_content": [{"url": f"https://example.com/img/{index}.jpg"}],
+    }
+
+
+def typical_feed(count: int) -> List[Dict[str, Any]]:
+    body = "<p>Краткое описание новости &mdash; " + _FILLER * 3 + "</p>\n<p>" + _FILLER + "&nbsp;</p>"
+    return [make_entry(index, body) for index in range(count)]
+
+
+def huge_feed(count: int, megabytes: int) -> List[Dict[str, Any]]:
+    paragraph = f"<p>{_FILLER}&amp; <b>ещё</b> текст</p>\n"
+    body = paragraph * (megabytes * 1024 * 1024 // len(paragraph.encode("utf-8")))
+    return [make_entry(index, body) for index in range(count)]
+
+
+def timed(fn: Callable[[], object], repeat: int = 7) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--huge-mb", type=int, default=4)
+    args = parser.parse_args()
+
+    for name, entries in (
+        ("typical", typical_feed(args.entries)),
+        (f"{args.huge_mb}MB body", huge_feed(5, args.huge_mb)),
+    ):
+        old = timed(lambda: legacy_entries(entries, "bench"))
+        new = timed(lambda: normalize_entries(entries, "bench"))
+        print(
+            f"{name:<12} legacy {old * 1e6 / len(entries):10.1f} us/entry   "
+            f"windowed {new * 1e6 / len(entries):10.1f} us/entry   x{old / new:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Offline end-to-end benchmark: recorded/generated feeds and article pages are
+served by a local mock server together with a stand-in backend, and the real
+pipeline (process_source / run_cycle) runs against them.
+
+    python -m bench.run [--scenario all|source|cycle] [--sink http|jsonl|sqlite] [--json report.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import asdict
+from typing import Any, Dict, List
+
+from bench.mock_server import FIXTURE_FEEDS, BenchSpec, start_in_process
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class StageRecorder:
+    """Exact per-stage latency samples for one scenario (the histograms only keep buckets)."""
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def __call__(self, source: str, stage: str, seconds: float) -> None:
+        self.samples[stage].append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {
+                "count": len(values),
+                "p50_ms": percentile(values, 0.5) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+            }
+            for stage, values in sorted(self.samples.items())
+        }
+
+
+def _item_counts() -> Dict[str, float]:
+    import metrics
+
+    counts: Dict[str, float] = defaultdict(float)
+    for key, value in metrics.ITEMS.snapshot().items():
+        counts[key.rsplit(",", 1)[-1]] += value
+    return counts
+
+
+async def _measure(name: str, run: Any) -> Dict[str, Any]:
+    import metrics
+
+    recorder = StageRecorder()
+    before = _item_counts()
+    metrics.add_stage_listener(recorder)
+    started = time.perf_counter()
+    try:
+        await run()
+    finally:
+        metrics.remove_stage_listener(recorder)
+    elapsed = time.perf_counter() - started
+    after = _item_counts()
+    items = {key: int(after[key] - before.get(key, 0)) for key in after if after[key] - before.get(key, 0)}
+    delivered = sum(items.get(key, 0) for key in ("created", "duplicate", "error"))
+    return {
+        "scenario": name,
+        "seconds": round(elapsed, 3),
+        "items": items,
+        "items_per_sec": round(delivered / elapsed, 1) if elapsed else 0.0,
+        "stages": recorder.summary(),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+async def run_benchmarks(spec: BenchSpec, scenarios: List[str], base_url: str) -> List[Dict[str, Any]]:
+    # Imported late: GNEWS_URL / BACKEND_BASE_URL / STATE_DIR are read at import or config time.
+    import main
+    from core.models import SourceConfig
+    from http_transport import close_transport, configure_transport
+
+    cfg = main.get_config()
+    transport = configure_transport(**main.transport_options(cfg))
+    client = main.build_sink(cfg, transport)
+    ctx = main.build_context(cfg)
+    main.start_delivery(client, cfg, ctx)
+    reports: List[Dict[str, Any]] = []
+    try:
+        if "source" in scenarios:
+            large = SourceConfig(name="large", rss_url=f"{base_url}/feeds/large.xml")
+            for phase in ("cold", "warm"):
+                reports.append(
+                    await _measure(f"process_source[large,{phase}]", lambda: main.process_source(large, client, cfg, ctx))
+                )
+        if "cycle" in scenarios:
+            sources = [SourceConfig(name=name, rss_url=f"{base_url}/feeds/{name}.xml") for name in spec.generated_feeds()]
+            sources += [SourceConfig(name=name, rss_url=f"{base_url}/feeds/{name}.xml") for name in FIXTURE_FEEDS]
+            sources.append(SourceConfig(name="gnews", type="gnews", api_token="bench", params={"lang": "ru"}))
+            for phase in ("cold", "warm"):
+                reports.append(await _measure(f"run_cycle[{phase}]", lambda: main.run_cycle(sources, client, cfg, ctx)))
+    finally:
+        if ctx.delivery is not None:
+            await ctx.delivery.close()
+        await client.close()
+        await close_transport()
+        ctx.close()
+    return reports
+
+
+def print_report(reports: List[Dict[str, Any]]) -> None:
+    for report in reports:
+        print(
+            f"\n{report['scenario']}: {report['seconds']}s, {report['items_per_sec']} items/s, "
+            f"peak RSS {report['peak_rss_mb']} MB, items {report['items']}"
+        )
+        for stage, row in report["stages"].items():
+            print(f"  {stage:<10} n={row['count']:<6} p50={row['p50_ms']:9.2f} ms  p99={row['p99_ms']:9.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=("all", "source", "cycle"), default="all")
+    parser.add_argument("--feeds", type=int, default=BenchSpec.feeds)
+    parser.add_argument("--items", type=int, default=BenchSpec.items)
+    parser.add_argument("--large-feed-mb", type=float, default=BenchSpec.large_feed_mb)
+    parser.add_argument("--large-feed-items", type=int, default=BenchSpec.large_feed_items)
+    parser.add_argument("--empty-text-every", type=int, default=BenchSpec.empty_text_every)
+    parser.add_argument("--pathological-every", type=int, default=BenchSpec.pathological_every)
+    parser.add_argument("--backend-latency-ms", type=float, default=BenchSpec.backend_latency_ms)
+    parser.add_argument("--known-ratio", type=float, default=BenchSpec.known_ratio)
+    parser.add_argument("--no-batch", action="store_true", help="backend without the batch endpoint")
+    parser.add_argument(
+        "--sink", action="append", choices=("http", "jsonl", "sqlite"), help="deliver to these sinks (default: http)"
+    )
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    spec = BenchSpec(
+        feeds=args.feeds,
+        items=args.items,
+        large_feed_mb=args.large_feed_mb,
+        large_feed_items=args.large_feed_items,
+        empty_text_every=args.empty_text_every,
+        pathological_every=args.pathological_every,
+        backend_latency_ms=args.backend_latency_ms,
+        known_ratio=args.known_ratio,
+        batch=not args.no_batch,
+    )
+    process, port = start_in_process(spec)
+    base_url = f"http://127.0.0.1:{port}"
+    os.environ["BACKEND_BASE_URL"] = base_url
+    os.environ["GNEWS_URL"] = f"{base_url}/gnews"
+    os.environ["STATE_DIR"] = tempfile.mkdtemp(prefix="parser-bench-")  # cold start every time
+    if args.sink:
+        os.environ["SINKS"] = ",".join(args.sink)
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+
+    scenarios = ["source", "cycle"] if args.scenario == "all" else [args.scenario]
+    try:
+        reports = asyncio.run(run_benchmarks(spec, scenarios, base_url))
+    finally:
+        process.terminate()
+        process.join(5)
+    print_report(reports)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"spec": asdict(spec), "reports": reports}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,31 +2,57 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Tuple
 
 from core.models import SourceConfig
 
 ROOT_DIR = Path(__file__).resolve().parent
 DEFAULT_CONFIG_PATH = ROOT_DIR / "config" / "sources.yaml"
 
+# path -> ((mtime_ns, size), sources): the scheduler reloads the config every
+# few seconds, and it rarely changes
+_cache: Dict[Path, Tuple[Tuple[int, int], List[SourceConfig]]] = {}
+
 
 def load_sources(config_path: Path = DEFAULT_CONFIG_PATH) -> List[SourceConfig]:
+    """Enabled sources of the config; the file is parsed again only when its mtime or size changes."""
+    stat = config_path.stat()
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(config_path)
+    if cached is not None and cached[0] == version:
+        return list(cached[1])
+    sources = _parse_sources(config_path)
+    _cache[config_path] = (version, sources)
+    return list(sources)
+
+
+def _parse_sources(config_path: Path) -> List[SourceConfig]:
     with config_path.open("r", encoding="utf-8") as f:
         raw = json.load(f)
     sources_data = raw.get("sources", [])
+    profiles = raw.get("extraction_profiles", {})
+    default_interval = raw.get("poll_interval_seconds")
     sources: List[SourceConfig] = []
     for item in sources_data:
         if not item.get("enabled", True):
             continue
+        params = dict(item.get("params", {}))
+        # "extraction" may name a shared profile or hold the selectors inline
+        extraction = item.get("extraction", params.get("extraction"))
+        if isinstance(extraction, str):
+            extraction = profiles.get(extraction)
+        if extraction:
+            params["extraction"] = extraction
         try:
             sources.append(
                 SourceConfig(
                     name=item["name"],
                     rss_url=item.get("rss_url"),
                     type=item.get("type", "rss"),
-                    params=item.get("params", {}),
+                    params=params,
                     api_token=item.get("api_token"),
                     enabled=True,
+                    poll_interval_seconds=item.get("poll_interval_seconds", default_interval),
                 )
             )
         except KeyError:
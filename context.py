@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:  # components are imported only by the code that builds them
+    from dedup import NearDuplicateIndex
+    from delivery import DeliveryPipeline
+    from enrichment import Enricher
+    from feed_cache import FeedCache
+    from gnews_adapter import GNewsClient
+    from page_cache import PageCache
+    from parse_pool import ParsePool
+    from profiler import CycleProfiler
+    from seen_index import SeenIndex
+    from sharding import ShardCoordinator
+    from spool import OutboundSpool
+
+
+@dataclass
+class ParserContext:
+    """
+    Long-lived state shared by every source of one parser process.
+    Components left as None are disabled.
+    """
+
+    feed_cache: Optional[FeedCache] = None
+    seen_index: Optional[SeenIndex] = None
+    enricher: Optional[Enricher] = None
+    parse_pool: Optional[ParsePool] = None
+    spool: Optional[OutboundSpool] = None
+    delivery: Optional[DeliveryPipeline] = None
+    near_dup: Optional[NearDuplicateIndex] = None
+    page_cache: Optional[PageCache] = None
+    gnews: Optional[GNewsClient] = None
+    shard: Optional[ShardCoordinator] = None
+    profiler: Optional[CycleProfiler] = None
+
+    def close(self) -> None:
+        if self.profiler is not None:
+            self.profiler.close()
+        if self.feed_cache is not None:
+            self.feed_cache.close()
+        if self.seen_index is not None:
+            self.seen_index.close()
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown()
+        if self.spool is not None:
+            self.spool.close()
+        if self.near_dup is not None:
+            self.near_dup.close()
+        if self.page_cache is not None:
+            self.page_cache.close()
+        if self.gnews is not None:
+            self.gnews.close()
+        if self.shard is not None:
+            self.shard.close()
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_lxml_etree: Any = None
+_lxml_checked = False
+
+VOID_TAGS = frozenset(
+    ("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr")
+)
+# Text inside these never shows up in get_text()-style output.
+SKIP_TEXT_TAGS = frozenset(("script", "style", "template"))
+
+
+@dataclass(frozen=True)
+class Selector:
+    """Single-element CSS selector: `tag`, `tag.class`, `tag#id`, `.class` or `#id`."""
+
+    tag: Optional[str] = None
+    cls: Optional[str] = None
+    id: Optional[str] = None
+
+    @classmethod
+    def parse(cls, raw: str) -> "Selector":
+        raw = raw.strip()
+        tag, sel_cls, sel_id = raw, None, None
+        if "#" in tag:
+            tag, sel_id = tag.split("#", 1)
+        if "." in tag:
+            tag, sel_cls = tag.split(".", 1)
+        return cls(tag=tag.lower() or None, cls=sel_cls or None, id=sel_id or None)
+
+    def matches(self, tag: str, attrs: Mapping[str, Optional[str]]) -> bool:
+        if self.tag and self.tag != tag:
+            return False
+        if self.id and attrs.get("id") != self.id:
+            return False
+        if self.cls and self.cls not in (attrs.get("class") or "").split():
+            return False
+        return True
+
+
+def _selectors(raw: Sequence[str]) -> Tuple[Selector, ...]:
+    return tuple(Selector.parse(item) for item in raw if item and item.strip())
+
+
+@dataclass(frozen=True)
+class ExtractionProfile:
+    """
+    What to pull out of an article page: meta image properties, the elements
+    whose <img> tags count as article images, and text containers by priority.
+    """
+
+    meta_images: Tuple[str, ...] = ("og:image", "twitter:image")
+    image_scopes: Tuple[Selector, ...] = _selectors(("article", "main"))
+    containers: Tuple[Selector, ...] = _selectors(
+        ("article", "div.article__body", "div.article-body", "div#article", "div.content")
+    )
+
+    @classmethod
+    def from_params(cls, params: Optional[Mapping[str, Any]]) -> "ExtractionProfile":
+        """Build a profile from a source's `params["extraction"]`, keeping defaults for missing keys."""
+        raw = (params or {}).get("extraction") or {}
+        if not isinstance(raw, Mapping) or not raw:
+            return DEFAULT_PROFILE
+        return cls(
+            meta_images=tuple(raw.get("meta_images") or DEFAULT_PROFILE.meta_images),
+            image_scopes=_selectors(raw["image_scopes"]) if raw.get("image_scopes") else DEFAULT_PROFILE.image_scopes,
+            containers=_selectors(raw["containers"]) if raw.get("containers") else DEFAULT_PROFILE.containers,
+        )
+
+
+DEFAULT_PROFILE = ExtractionProfile()
+
+
+@dataclass
+class _Frame:
+    tag: str
+    containers: List[int] = field(default_factory=list)
+    scopes: int = 0
+    paragraph: bool = False
+    skip: bool = False
+
+
+class _Collector:
+    """
+    Parser target that gathers everything in one walk over the document.
+    Implements the lxml target interface (start/end/data/close); the stdlib
+    backend feeds it the same events.
+    """
+
+    def __init__(self, profile: ExtractionProfile) -> None:
+        self.profile = profile
+        self.stack: List[_Frame] = []
+        self.meta: Dict[str, str] = {}
+        self.scope_images: List[List[str]] = [[] for _ in profile.image_scopes]
+        self.all_images: List[str] = []
+        self.container_parts: List[Optional[List[str]]] = [None] * len(profile.containers)
+        self.container_open = [False] * len(profile.containers)
+        self.paragraphs: List[List[str]] = []
+        self.open_scopes = [0] * len(profile.image_scopes)
+        self.skip_depth = 0
+        self.paragraph_depth = 0
+
+    def start(self, tag: str, attrs: Mapping[str, Optional[str]]) -> None:
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag == "p" and self.paragraph_depth:
+            self._close_to("p")  # a new <p> implicitly closes the open one
+        frame = _Frame(tag)
+        if tag == "meta":
+            prop = attrs.get("property") or attrs.get("name")
+            content = attrs.get("content")
+            if prop in self.profile.meta_images and content and prop not in self.meta:
+                self.meta[prop] = content
+        elif tag == "img":
+            src = attrs.get("src")
+            if src:
+                self.all_images.append(src)
+                for idx, depth in enumerate(self.open_scopes):
+                    if depth:
+                        self.scope_images[idx].append(src)
+        for idx, selector in enumerate(self.profile.image_scopes):
+            if selector.matches(tag, attrs):
+                self.open_scopes[idx] += 1
+                frame.scopes |= 1 << idx
+        for idx, selector in enumerate(self.profile.containers):
+            if self.container_parts[idx] is None and selector.matches(tag, attrs):
+                self.container_parts[idx] = []
+                self.container_open[idx] = True
+                frame.containers.append(idx)
+        if tag == "p":
+            self.paragraphs.append([])
+            self.paragraph_depth += 1
+            frame.paragraph = True
+        if tag in SKIP_TEXT_TAGS:
+            self.skip_depth += 1
+            frame.skip = True
+        self.stack.append(frame)
+
+    def end(self, tag: str) -> None:
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if any(frame.tag == tag for frame in self.stack):
+            self._close_to(tag)
+
+    def _close_to(self, tag: str) -> None:
+        while self.stack:
+            frame = self.stack.pop()
+            for idx in range(len(self.open_scopes)):
+                if frame.scopes & (1 << idx):
+                    self.open_scopes[idx] -= 1
+            for idx in frame.containers:
+                self.container_open[idx] = False
+            if frame.paragraph:
+                self.paragraph_depth -= 1
+            if frame.skip:
+                self.skip_depth -= 1
+            if frame.tag == tag:
+                return
+
+    def data(self, text: str) -> None:
+        if self.skip_depth:
+            return
+        text = text.strip()
+        if not text:
+            return
+        for idx, is_open in enumerate(self.container_open):
+            if is_open:
+                self.container_parts[idx].append(text)  # type: ignore[union-attr]
+        if self.paragraph_depth:
+            self.paragraphs[-1].append(text)
+
+    def comment(self, text: str) -> None:
+        return None
+
+    def close(self) -> "_Collector":
+        return self
+
+    def result(self) -> Tuple[str, List[str]]:
+        images: List[str] = [self.meta[prop] for prop in self.profile.meta_images if prop in self.meta]
+        for bucket in self.scope_images:
+            images.extend(bucket)
+        text = ""
+        for parts in self.container_parts:
+            if parts:
+                text = " ".join(parts)
+                break
+        else:
+            text = " ".join(" ".join(parts) for parts in self.paragraphs if parts)
+        return text, _dedupe(images)
+
+
+class _StdlibFeeder(HTMLParser):
+    def __init__(self, target: _Collector) -> None:
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.target.start(tag, dict(attrs))
+        if tag in VOID_TAGS:
+            self.target.end(tag)
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.target.start(tag, dict(attrs))
+        self.target.end(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag not in VOID_TAGS:
+            self.target.end(tag)
+
+    def handle_data(self, data: str) -> None:
+        self.target.data(data)
+
+
+def _dedupe(urls: List[str]) -> List[str]:
+    seen = set()
+    unique: List[str] = []
+    for url in urls:
+        url = url.strip()
+        if url and url not in seen:
+            seen.add(url)
+            unique.append(url)
+    return unique
+
+
+def _lxml() -> Any:
+    """The optional fast backend, imported on first use: it costs more start-up time than the rest of the parser."""
+    global _lxml_etree, _lxml_checked
+    if not _lxml_checked:
+        _lxml_checked = True
+        try:
+            from lxml import etree  # type: ignore
+
+            _lxml_etree = etree
+        except Exception:  # pragma: no cover - depends on environment
+            _lxml_etree = None
+    return _lxml_etree
+
+
+def parser_backend() -> str:
+    return "lxml" if _lxml() is not None else "html.parser"
+
+
+def _walk(html: str, profile: ExtractionProfile) -> _Collector:
+    collector = _Collector(profile)
+    if not html:
+        return collector
+    etree = _lxml()
+    if etree is not None:
+        try:
+            parser = etree.HTMLParser(target=collector, recover=True)
+            parser.feed(html)
+            parser.close()
+            return collector
+        except Exception:  # noqa: BLE001
+            logger.debug("lxml failed, falling back to html.parser", exc_info=True)
+            collector = _Collector(profile)
+    feeder = _StdlibFeeder(collector)
+    feeder.feed(html)
+    feeder.close()
+    return collector
+
+
+def extract_article(html: str, profile: ExtractionProfile = DEFAULT_PROFILE) -> Tuple[str, List[str]]:
+    """
+    Body text and image URLs of an article page in a single traversal.
+
+    Images: meta images (profile order), then <img> inside each image scope.
+    Text: the first container selector whose first match has text, else all <p>.
+    """
+    return _walk(html, profile).result()
+
+
+def extract_images(html: str) -> List[str]:
+    """All <img src> URLs of an HTML fragment, in document order."""
+    return _dedupe(_walk(html, DEFAULT_PROFILE).all_images)
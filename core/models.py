@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
@@ -13,10 +14,17 @@ class SourceConfig:
     params: Dict[str, Any] = field(default_factory=dict)
     api_token: Optional[str] = None
     enabled: bool = True
+    poll_interval_seconds: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class NewsItem:
+    """
+    One normalized news item. Slotted, and the strings repeated across items
+    (source name, hashtags) are interned: thousands of these stay alive at once
+    in large feeds, the spool and the near-duplicate window.
+    """
+
     header: str
     text: str
     date: datetime
@@ -26,8 +34,45 @@ class NewsItem:
     image_urls: List[str]
 
     def __post_init__(self) -> None:
+        self.source_name = sys.intern(self.source_name)
+        self.hashtags = [sys.intern(tag) for tag in self.hashtags]
         # Ensure date is timezone-aware UTC to keep sorting consistent.
         if self.date.tzinfo is None:
             self.date = self.date.replace(tzinfo=timezone.utc)
         else:
             self.date = self.date.astimezone(timezone.utc)
+
+
+@dataclass
+class SourceRunStats:
+    """Outcome of one pass over a source."""
+
+    name: str
+    fetched: int = 0
+    created: int = 0
+    duplicates: int = 0
+    errors: int = 0
+    # newest item the backend answered for, and oldest item it failed on
+    newest_answered: Optional[datetime] = None
+    oldest_failed: Optional[datetime] = None
+
+    def record(self, item: NewsItem, result: Optional[bool]) -> None:
+        if result is None:
+            self.errors += 1
+            if self.oldest_failed is None or item.date < self.oldest_failed:
+                self.oldest_failed = item.date
+            return
+        if result:
+            self.created += 1
+        else:
+            self.duplicates += 1
+        if self.newest_answered is None or item.date > self.newest_answered:
+            self.newest_answered = item.date
+
+    def watermark(self) -> Optional[datetime]:
+        """Safe streaming watermark: never above an item that still has to be retried."""
+        if self.newest_answered is None:
+            return None
+        if self.oldest_failed is not None:
+            return min(self.newest_answered, self.oldest_failed)
+        return self.newest_answered
@@ -4,8 +4,9 @@ import html
 import logging
 import re
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set
 
+from .extraction import extract_images
 from .models import NewsItem
 
 logger = logging.getLogger(__name__)
@@ -14,31 +15,144 @@ HEADER_MAX_LEN = 512
 TEXT_MAX_LEN = 50_000
 HASHTAG_MAX = 20
 
+# Raw markup is cleaned window by window, so a multi-megabyte body stops
+# being processed as soon as enough text has been produced.
+CLEAN_WINDOW = 16 * 1024
+# Input up to this many times the limit is cleaned in one pass: windows only
+# pay off when most of it is going to be cut away.
+ONE_PASS_FACTOR = 2
+# Longest entity reference html.unescape decodes, with a margin.
+_ENTITY_MAX_LEN = 40
 
-def _strip_html(raw: str) -> str:
-    """Best-effort HTML tag removal using regex (no external deps)."""
-    if not raw:
-        return ""
-    return re.sub(r"<[^>]+>", " ", raw)
+_TAG_RE = re.compile(r"<[^>]+>")
+_IMG_TAG_RE = re.compile(r"<img", re.IGNORECASE)
+_HTML_SPACE = " \t\r\f\n"
+# What may follow "&" in a reference html.unescape has not seen the end of yet.
+_ENTITY_TAIL_RE = re.compile(r"[^\t\n\f <>&;]*")
+
+
+def _squeeze(text: str, pair: str, single: str) -> str:
+    while pair in text:
+        text = text.replace(pair, single)
+    return text
+
+
+def _collapse(text: str, newlines: bool) -> str:
+    """
+    Runs of whitespace become one space; with `newlines` (HTML bodies) a run
+    holding a newline becomes one newline. A run at either end is kept as
+    one separator, so windows collapsed separately still join correctly.
+    """
+    if newlines:
+        return _collapse_html(text)
+    body = " ".join(text.split())
+    if len(body) == len(text):
+        return body
+    if not body:
+        return " " if text else ""
+    if text[0].isspace():
+        body = " " + body
+    if text[-1].isspace():
+        body += " "
+    return body
+
+
+def _collapse_lines(text: str) -> str:
+    """
+    Bodies follow HTML and collapse only space, tab, CR, FF and LF (`&nbsp;`
+    stays); the ends are stripped. Lines are split on the newlines and
+    stripped, which leaves one scan for double spaces inside them: str.split()
+    and regexes walk every character and are several times slower on
+    non-ASCII text.
+    """
+    for char in "\t\r\f":
+        if char in text:
+            text = text.replace(char, " ")
+    body = "\n".join(filter(None, [line.strip(" ") for line in text.split("\n")]))
+    return _squeeze(body, "  ", " ")
+
+
+def _collapse_html(text: str) -> str:
+    """`_collapse_lines` that keeps a run at either end as one separator."""
+    body = _collapse_lines(text)
+    if not body:
+        return "\n" if "\n" in text else " " if text else ""
+    head = len(text) - len(text.lstrip(_HTML_SPACE))
+    if head:
+        body = ("\n" if "\n" in text[:head] else " ") + body
+    tail = len(text) - len(text.rstrip(_HTML_SPACE))
+    if tail:
+        body += "\n" if "\n" in text[len(text) - tail :] else " "
+    return body
+
+
+def _window_end(raw: str, start: int, end: int) -> int:
+    """Move a window end off a tag or an entity reference it would cut in half."""
+    lt = raw.rfind("<", start, end)
+    if lt > raw.rfind(">", start, end):
+        gt = raw.find(">", end)
+        if gt != -1:
+            return gt + 1
+    amp = raw.rfind("&", max(start, end - _ENTITY_MAX_LEN), end)
+    if amp > start and _ENTITY_TAIL_RE.fullmatch(raw, amp + 1, end):
+        return amp
+    return end
+
+
+def _clean_part(part: str, markup: bool, newlines: bool) -> str:
+    if markup and "<" in part:
+        part = _TAG_RE.sub(" ", part)
+    return _collapse(html.unescape(part), newlines)
+
+
+def _clean(raw: str, limit: int, markup: bool, newlines: bool) -> str:
+    """
+    Strip tags (if `markup`), decode entities and collapse whitespace window
+    by window, stopping once the first `limit` characters of the result are
+    known. Short input (typical entries, anything up to `ONE_PASS_FACTOR`
+    times the limit) is cleaned in one pass and skips the bookkeeping.
+    """
+    if len(raw) <= max(CLEAN_WINDOW, limit * ONE_PASS_FACTOR):
+        # No junctions to keep separators for: collapse straight to stripped text.
+        if markup and "<" in raw:
+            raw = _TAG_RE.sub(" ", raw)
+        text = html.unescape(raw)
+        if newlines:
+            return _collapse_lines(text).strip()[:limit]
+        return " ".join(text.split())[:limit]
+    parts: List[str] = []
+    produced = 0
+    start, size = 0, len(raw)
+    while start < size:
+        end = size if size - start <= CLEAN_WINDOW else _window_end(raw, start, start + CLEAN_WINDOW)
+        part = _clean_part(raw[start:end], markup, newlines)
+        parts.append(part)
+        produced += len(part)
+        start = end
+        # Joining windows loses a separator per junction and stripping the
+        # ends may lose more (`&nbsp;` runs), so a stop is confirmed on the
+        # stripped text: once it has `limit` characters, later input can only
+        # change whitespace after them.
+        if produced - len(parts) - 2 >= limit:
+            text = _collapse("".join(parts), newlines).strip()
+            if len(text) >= limit:
+                return text[:limit]
+    return _collapse("".join(parts), newlines).strip()[:limit]
 
 
 def normalize_header(title: str) -> str:
-    title = html.unescape(title or "").strip()
-    title = re.sub(r"\s+", " ", title)
-    return title[:HEADER_MAX_LEN]
+    return _clean(title or "", HEADER_MAX_LEN, markup=False, newlines=False)
 
 
 def normalize_text(raw: str) -> str:
-    cleaned = _strip_html(raw or "")
-    cleaned = html.unescape(cleaned)
-    cleaned = cleaned.strip()
-    return cleaned[:TEXT_MAX_LEN]
+    """Plain text of an HTML fragment: paragraph breaks are kept as single newlines."""
+    return _clean(raw or "", TEXT_MAX_LEN, markup=True, newlines=True)
 
 
-def _parse_datetime(entry: Dict[str, Any]) -> datetime:
+def _parse_datetime(entry: Dict[str, Any], fallback: Optional[datetime] = None) -> datetime:
     """
     Convert various feedparser date hints to a timezone-aware UTC datetime.
-    Falls back to current UTC when missing.
+    Falls back to `fallback` (current UTC by default) when missing.
     """
     for key in ("published_parsed", "updated_parsed"):
         tm = entry.get(key)
@@ -61,22 +175,24 @@ def _parse_datetime(entry: Dict[str, Any]) -> datetime:
             except Exception:
                 continue
 
-    return datetime.now(tz=timezone.utc)
+    return fallback or datetime.now(tz=timezone.utc)
 
 
 def _normalize_hashtags(entry: Dict[str, Any]) -> List[str]:
     tags: Iterable[Any] = entry.get("tags", []) or entry.get("category", []) or []
-    normalized = []
+    normalized: List[str] = []
+    seen: Set[str] = set()
     for tag in tags:
         if isinstance(tag, dict):
             term = tag.get("term") or tag.get("label") or ""
         else:
             term = str(tag)
         term = term.strip().lower()
-        if term and term not in normalized:
+        if term and term not in seen:
+            seen.add(term)
             normalized.append(term)
-        if len(normalized) >= HASHTAG_MAX:
-            break
+            if len(normalized) >= HASHTAG_MAX:
+                break
     return normalized
 
 
@@ -112,7 +228,7 @@ def _extract_text(entry: Dict[str, Any]) -> str:
 
     for cand in candidates:
         text = _from_content(cand)
-        if text and text.strip():
+        if text and not text.isspace():
             return text
     return ""
 
@@ -122,12 +238,14 @@ def _extract_images(entry: Dict[str, Any]) -> List[str]:
     Extract image URLs from RSS entry metadata.
     """
     urls: List[str] = []
+    seen: Set[str] = set()
 
     def add(url: Optional[str]):
         if not url:
             return
         url = str(url).strip()
-        if url and url not in urls:
+        if url and url not in seen:
+            seen.add(url)
             urls.append(url)
 
     # media content/thumbnail
@@ -147,26 +265,29 @@ def _extract_images(entry: Dict[str, Any]) -> List[str]:
             if typ.startswith("image/"):
                 add(enclosure.get("href") or enclosure.get("url"))
 
-    # img tags inside description / summary
+    # img tags inside description / summary (often the same HTML: parse it once)
+    parsed: List[str] = []
     for key in ("summary", "description"):
         html_part = entry.get(key)
-        if isinstance(html_part, str) and "<img" in html_part.lower():
+        if isinstance(html_part, str) and html_part not in parsed and _IMG_TAG_RE.search(html_part):
+            parsed.append(html_part)
             try:
-                import bs4  # type: ignore
-
-                soup = bs4.BeautifulSoup(html_part, "html.parser")
-                for img in soup.find_all("img"):
-                    add(img.get("src"))
+                for src in extract_images(html_part):
+                    add(src)
             except Exception:
                 continue
 
     return urls
 
 
-def normalize_entry(entry: Dict[str, Any], source_name: str) -> NewsItem:
+def normalize_entry(
+    entry: Dict[str, Any],
+    source_name: str,
+    fallback_date: Optional[datetime] = None,
+) -> NewsItem:
     header_raw = entry.get("title", "")
     text_raw = _extract_text(entry)
-    date_dt = _parse_datetime(entry)
+    date_dt = _parse_datetime(entry, fallback_date)
     hashtags = _normalize_hashtags(entry)
     link = entry.get("link", "")
     image_urls = _extract_images(entry)
@@ -183,3 +304,9 @@ def normalize_entry(entry: Dict[str, Any], source_name: str) -> NewsItem:
         url=link,
         image_urls=image_urls,
     )
+
+
+def normalize_entries(entries: Iterable[Dict[str, Any]], source_name: str) -> List[NewsItem]:
+    """Normalize a whole feed; entries without a date share one fallback timestamp."""
+    fallback_date = datetime.now(tz=timezone.utc)
+    return [normalize_entry(entry, source_name, fallback_date) for entry in entries]
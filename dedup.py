@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+import re
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from core.models import NewsItem
+from storage import connect
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+MIN_TITLE_TOKENS = 4  # shorter headlines ("Главное за день") match far too much
+MIN_BODY_TOKENS = 20
+BODY_LEAD_CHARS = 600  # wire copies share the lead, not the tail
+MODES = ("off", "tag", "suppress")
+COMPACT_EVERY_SECONDS = 600
+
+_TOKEN_RE = re.compile(r"\w{2,}", re.UNICODE)
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(0x5EED)  # fixed: signatures are persisted and compared across restarts
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_SIGNATURE = struct.Struct(f"<{NUM_PERM}I")
+
+Signature = Tuple[int, ...]
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower().replace("ё", "е"))
+
+
+def minhash(features: Set[str]) -> Signature:
+    hashes = [int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "little") for f in features]
+    return tuple(min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    """Estimated Jaccard similarity of the two feature sets."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+@dataclass
+class Fingerprint:
+    """MinHash of the headline words and of the body lead's word pairs (None when too short)."""
+
+    title: Optional[Signature]
+    body: Optional[Signature]
+
+    @classmethod
+    def of(cls, item: NewsItem) -> "Fingerprint":
+        title_tokens = _tokens(item.header)
+        body_tokens = _tokens(item.text[:BODY_LEAD_CHARS])
+        title = minhash(set(title_tokens)) if len(set(title_tokens)) >= MIN_TITLE_TOKENS else None
+        body = None
+        if len(body_tokens) >= MIN_BODY_TOKENS:
+            body = minhash({f"{a} {b}" for a, b in zip(body_tokens, body_tokens[1:])})
+        return cls(title=title, body=body)
+
+
+@dataclass
+class NearDuplicate:
+    """An already delivered item from another source that looks like the same story."""
+
+    source: str
+    header: str
+    url: str
+    similarity: float
+
+
+@dataclass
+class _Entry:
+    id: int
+    fingerprint: Fingerprint
+    source: str
+    header: str
+    url: str
+    added_at: float
+
+
+def _lsh_rows(threshold: float) -> int:
+    """Rows per LSH band: the widest band whose S-curve midpoint sits comfortably below the threshold."""
+    for rows in range(8, 0, -1):
+        bands = NUM_PERM // rows
+        if (1 / bands) ** (1 / rows) <= threshold - 0.1:
+            return rows
+    return 1
+
+
+class NearDuplicateIndex:
+    """
+    Time-windowed MinHash/LSH index of delivered items.
+
+    An item is a near duplicate when its headline or its body lead is at least
+    `threshold` similar (Jaccard) to an item another source delivered during
+    the last `window_seconds`. With a path, entries survive restarts, and
+    `refresh` picks up what other processes sharing the file added since.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        window_seconds: int = 6 * 3600,
+        path: Optional[Path] = None,
+        mode: str = "tag",
+    ) -> None:
+        self.threshold = min(1.0, max(0.1, threshold))
+        self.window_seconds = window_seconds
+        self.mode = mode if mode in MODES else "tag"
+        self.rows = _lsh_rows(self.threshold)
+        self._entries: Dict[int, _Entry] = {}
+        self._buckets: Dict[Tuple[str, int, Signature], Set[int]] = {}
+        self._order: Deque[Tuple[float, int]] = deque()
+        self._next_id = 0
+        self._last_rowid = 0
+        self._own_rowids: Set[int] = set()
+        self._last_compact = time.time()
+        self._conn = None
+        if path is not None:
+            self._conn = connect(path)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS near_dup_entries (
+                    title_sig BLOB,
+                    body_sig BLOB,
+                    source TEXT NOT NULL,
+                    header TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    added_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS near_dup_added_at ON near_dup_entries (added_at)")
+            self._load()
+
+    @property
+    def suppress(self) -> bool:
+        return self.mode == "suppress"
+
+    def check(self, source_name: str) -> "NearDuplicateCheck":
+        return NearDuplicateCheck(self, source_name)
+
+    def _keys(self, fingerprint: Fingerprint) -> List[Tuple[str, int, Signature]]:
+        keys = []
+        for kind, signature in (("title", fingerprint.title), ("body", fingerprint.body)):
+            if signature is not None:
+                for band in range(NUM_PERM // self.rows):
+                    keys.append((kind, band, signature[band * self.rows : (band + 1) * self.rows]))
+        return keys
+
+    def _insert(self, entry: _Entry) -> None:
+        self._entries[entry.id] = entry
+        self._order.append((entry.added_at, entry.id))
+        for key in self._keys(entry.fingerprint):
+            self._buckets.setdefault(key, set()).add(entry.id)
+
+    def _evict(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._order and self._order[0][0] < cutoff:
+            _, entry_id = self._order.popleft()
+            entry = self._entries.pop(entry_id, None)
+            if entry is None:
+                continue
+            for key in self._keys(entry.fingerprint):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(entry_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def find(self, fingerprint: Fingerprint, source: str) -> Optional[NearDuplicate]:
+        self._evict(time.time())
+        candidates: Set[int] = set()
+        for key in self._keys(fingerprint):
+            candidates.update(self._buckets.get(key, ()))
+        best: Optional[NearDuplicate] = None
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            if entry.source == source:
+                continue  # same-source rewrites are the backend's business
+            pairs = ((fingerprint.title, entry.fingerprint.title), (fingerprint.body, entry.fingerprint.body))
+            for mine, theirs in pairs:
+                if mine is None or theirs is None:
+                    continue
+                score = similarity(mine, theirs)
+                if score >= self.threshold and (best is None or score > best.similarity):
+                    best = NearDuplicate(source=entry.source, header=entry.header, url=entry.url, similarity=score)
+        return best
+
+    def add(self, fingerprint: Fingerprint, item: NewsItem) -> None:
+        if fingerprint.title is None and fingerprint.body is None:
+            return
+        now = time.time()
+        self._next_id += 1
+        self._insert(_Entry(self._next_id, fingerprint, item.source_name, item.header, item.url, now))
+        if self._conn is not None:
+            cursor = self._conn.execute(
+                "INSERT INTO near_dup_entries (title_sig, body_sig, source, header, url, added_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (_pack(fingerprint.title), _pack(fingerprint.body), item.source_name, item.header, item.url, now),
+            )
+            self._own_rowids.add(cursor.lastrowid)
+
+    def _load(self) -> None:
+        assert self._conn is not None
+        self._conn.execute("DELETE FROM near_dup_entries WHERE added_at < ?", (time.time() - self.window_seconds,))
+        self.refresh()
+        if self._entries:
+            logger.info("Near-duplicate index loaded %d entries", len(self._entries))
+
+    def refresh(self) -> None:
+        """Load the entries added to the table since the last load, except our own."""
+        if self._conn is None:
+            return
+        last = self._conn.execute("SELECT MAX(rowid) FROM near_dup_entries").fetchone()[0] or 0
+        if last < self._last_rowid:
+            # the table was emptied and rowids started over
+            self._last_rowid = 0
+            self._own_rowids.clear()
+        rows = self._conn.execute(
+            "SELECT rowid, title_sig, body_sig, source, header, url, added_at FROM near_dup_entries"
+            " WHERE rowid > ? ORDER BY rowid",
+            (self._last_rowid,),
+        ).fetchall()
+        for rowid, title_sig, body_sig, source, header, url, added_at in rows:
+            self._last_rowid = rowid
+            if rowid in self._own_rowids:
+                continue
+            self._next_id += 1
+            fingerprint = Fingerprint(title=_unpack(title_sig), body=_unpack(body_sig))
+            self._insert(_Entry(self._next_id, fingerprint, source, header, url, added_at))
+        self._own_rowids = {rowid for rowid in self._own_rowids if rowid > self._last_rowid}
+
+    def compact(self) -> None:
+        now = time.time()
+        self._evict(now)
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM near_dup_entries WHERE added_at < ?", (now - self.window_seconds,))
+        self._last_compact = now
+
+    def maybe_compact(self) -> None:
+        if time.time() - self._last_compact >= COMPACT_EVERY_SECONDS:
+            self.compact()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+
+
+def _pack(signature: Optional[Signature]) -> Optional[bytes]:
+    return None if signature is None else _SIGNATURE.pack(*signature)
+
+
+def _unpack(blob: Optional[bytes]) -> Optional[Signature]:
+    return None if blob is None else _SIGNATURE.unpack(blob)
+
+
+class NearDuplicateCheck:
+    """
+    One source's delivery pass over the index. Each item is fingerprinted once,
+    from its feed text, so enrichment filling in the body later changes nothing.
+    """
+
+    def __init__(self, index: NearDuplicateIndex, source_name: str) -> None:
+        self.index = index
+        self.source_name = source_name
+        self._fingerprints: Dict[int, Fingerprint] = {}
+        self._matches: Dict[int, Optional[NearDuplicate]] = {}
+
+    def _fingerprint(self, item: NewsItem) -> Fingerprint:
+        key = id(item)
+        if key not in self._fingerprints:
+            self._fingerprints[key] = Fingerprint.of(item)
+        return self._fingerprints[key]
+
+    def match(self, item: NewsItem) -> Optional[NearDuplicate]:
+        key = id(item)
+        if key not in self._matches:
+            self._matches[key] = self.index.find(self._fingerprint(item), self.source_name)
+        return self._matches[key]
+
+    def suppressed(self, item: NewsItem) -> bool:
+        return self.index.suppress and self.match(item) is not None
+
+    def register(self, item: NewsItem) -> None:
+        self.index.add(self._fingerprint(item), item)
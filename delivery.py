@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List
+
+from core.models import NewsItem, SourceConfig, SourceRunStats
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DeliveryJob:
+    """All items of one source fetch, delivered by a single worker to keep their order."""
+
+    source: SourceConfig
+    items: List[NewsItem]
+    stream: bool = False
+    done: "asyncio.Future[SourceRunStats]" = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class DeliveryPipeline:
+    """
+    Bounded queue between fetching and delivery, drained by `workers` tasks.
+
+    `submit` waits while the queue is full, so fetchers slow down when the
+    backend does instead of piling items up in memory; the returned future
+    resolves with the source's run stats once its items are delivered.
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[[DeliveryJob], Awaitable[SourceRunStats]],
+        workers: int = 2,
+        queue_size: int = 8,
+    ) -> None:
+        self.deliver = deliver
+        self.workers = max(1, workers)
+        self._queue: "asyncio.Queue[DeliveryJob]" = asyncio.Queue(maxsize=max(1, queue_size))
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.workers)]
+
+    async def submit(self, source: SourceConfig, items: List[NewsItem], stream: bool = False) -> DeliveryJob:
+        job = DeliveryJob(source=source, items=items, stream=stream)
+        await self._queue.put(job)
+        return job
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.done.cancelled():
+                    continue
+                try:
+                    stats = await self.deliver(job)
+                except asyncio.CancelledError:
+                    job.done.cancel()
+                    raise
+                except Exception as exc:  # noqa: BLE001
+                    if not job.done.done():
+                        job.done.set_exception(exc)
+                else:
+                    if not job.done.done():
+                        job.done.set_result(stats)
+            finally:
+                self._queue.task_done()
+
+    async def close(self) -> None:
+        """Stop the workers; jobs still queued are cancelled."""
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._queue.empty():
+            self._queue.get_nowait().done.cancel()
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable, Dict, List
+from urllib.parse import urlsplit
+
+from core.extraction import DEFAULT_PROFILE, ExtractionProfile, extract_article
+from core.models import NewsItem
+from core.normalizer import normalize_text
+from http_transport import get_transport
+from metrics import PAGE_CACHE, stage_timer
+from page_cache import CachedPage, PageCache
+from parse_pool import ParsePool
+
+logger = logging.getLogger(__name__)
+
+
+class Enricher:
+    """
+    Concurrent full-text / image fallback for items the feed left empty.
+
+    Page loads run at most `concurrency` at a time overall and `per_host` at a
+    time per publisher host. Each source gets a deadline; items still loading
+    when it expires keep the data they came with. With a page cache,
+    articles seen in earlier cycles are served from it (or revalidated
+    with a conditional GET) instead of being downloaded and parsed again.
+    """
+
+    def __init__(
+        self,
+        request_timeout: int,
+        concurrency: int = 8,
+        per_host: int = 2,
+        deadline: float = 30.0,
+        parse_pool: ParsePool | None = None,
+        page_cache: PageCache | None = None,
+    ) -> None:
+        self.request_timeout = request_timeout
+        self.parse_pool = parse_pool
+        self.page_cache = page_cache
+        self.per_host = max(1, per_host)
+        self.deadline = deadline
+        self.lookahead = max(1, concurrency)
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @staticmethod
+    def needs_enrichment(item: NewsItem) -> bool:
+        return bool(item.url) and (not item.text.strip() or not item.image_urls)
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        sem = self._host_semaphores.get(host)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_host)
+            self._host_semaphores[host] = sem
+        return sem
+
+    async def enrich_item(self, item: NewsItem, profile: ExtractionProfile = DEFAULT_PROFILE) -> None:
+        need_text = not item.text.strip()
+        need_images = not item.image_urls
+        if not item.url or not (need_text or need_images):
+            return
+        cached = None
+        if self.page_cache is not None:
+            key = self.page_cache.key(item.url, profile)
+            cached = self.page_cache.get(key)
+        if cached is not None and self.page_cache.is_fresh(cached):
+            PAGE_CACHE.inc(source=item.source_name, result="hit")
+            full_text, images = cached.text, cached.images
+        else:
+            async with self._host_semaphore(item.url), self._semaphore:
+                with stage_timer(item.source_name, "enrich"):
+                    page = await _fetch_page(item.url, self.request_timeout, self.parse_pool, profile, cached)
+            if page is None:
+                full_text, images = "", []
+            else:
+                if self.page_cache is not None:
+                    if page is cached:
+                        PAGE_CACHE.inc(source=item.source_name, result="revalidated")
+                        self.page_cache.revalidated(key, page)
+                    else:
+                        PAGE_CACHE.inc(source=item.source_name, result="miss")
+                        self.page_cache.put(key, page)
+                full_text, images = page.text, page.images
+        if full_text and need_text:
+            item.text = normalize_text(full_text)
+        if images and need_images:
+            item.image_urls = images
+
+    def session(
+        self,
+        items: List[NewsItem],
+        source_name: str,
+        stop_at: Callable[[NewsItem], bool] | None = None,
+        profile: ExtractionProfile = DEFAULT_PROFILE,
+        skip: Callable[[NewsItem], bool] | None = None,
+    ) -> "EnrichmentSession":
+        return EnrichmentSession(self, items, source_name, stop_at, profile, skip)
+
+
+class EnrichmentSession:
+    """
+    Lazy, per-source enrichment over date-sorted items.
+
+    `ready(i)` makes sure item `i` is enriched before it is delivered, while
+    pages for the next few items load in the background. Prefetching never
+    goes past an item `stop_at` marks (delivery will stop there anyway), never
+    loads items `skip` marks (delivery won't send them), and `close()` cancels
+    whatever is still loading once the source stops.
+    """
+
+    def __init__(
+        self,
+        enricher: Enricher,
+        items: List[NewsItem],
+        source_name: str,
+        stop_at: Callable[[NewsItem], bool] | None = None,
+        profile: ExtractionProfile = DEFAULT_PROFILE,
+        skip: Callable[[NewsItem], bool] | None = None,
+    ) -> None:
+        self.enricher = enricher
+        self.items = items
+        self.source_name = source_name
+        self.stop_at = stop_at
+        self.profile = profile
+        self.skip = skip
+        self.lookahead = enricher.lookahead
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._next = 0
+        self._stopped = False
+        loop = asyncio.get_running_loop()
+        self._deadline = loop.time() + enricher.deadline if enricher.deadline > 0 else None
+        self._expired = 0
+
+    def _prefetch(self, upto: int) -> None:
+        upto = min(upto, len(self.items))
+        while not self._stopped and self._next < upto:
+            item = self.items[self._next]
+            if self.stop_at is not None and self.stop_at(item):
+                self._stopped = True
+                break
+            if Enricher.needs_enrichment(item) and not (self.skip is not None and self.skip(item)):
+                self._tasks[self._next] = asyncio.create_task(self.enricher.enrich_item(item, self.profile))
+            self._next += 1
+
+    async def ready(self, index: int) -> None:
+        # The first item is often already known to the backend: don't speculate before it.
+        self._prefetch(index + 1 + (self.lookahead if index > 0 else 0))
+        task = self._tasks.pop(index, None)
+        if task is None:
+            return
+        timeout = None
+        if self._deadline is not None:
+            timeout = max(0.0, self._deadline - asyncio.get_running_loop().time())
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+        if not done:
+            task.cancel()
+            self._expired += 1
+            return
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("Enrichment failed for %s: %s", self.source_name, task.exception())
+
+    async def close(self) -> None:
+        pending = list(self._tasks.values())
+        self._tasks.clear()
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if self._expired:
+            logger.warning(
+                "Enrichment deadline (%ss) hit for %s: %d items sent without full text",
+                self.enricher.deadline,
+                self.source_name,
+                self._expired,
+            )
+
+
+async def _fetch_page(
+    url: str,
+    timeout: int,
+    parse_pool: ParsePool | None = None,
+    profile: ExtractionProfile = DEFAULT_PROFILE,
+    cached: CachedPage | None = None,
+) -> CachedPage | None:
+    """
+    Best-effort fetch of article body/images when RSS entry has no data.
+    With a stale cached page, asks for it conditionally and returns the same
+    object on 304. None when the page could not be loaded.
+    """
+    headers = cached.request_headers() if cached is not None else {}
+    try:
+        resp = await get_transport().get(url, follow_redirects=True, timeout=timeout, headers=headers)
+        if resp.status_code == 304 and cached is not None:
+            return cached
+        resp.raise_for_status()
+        html = resp.text
+    except Exception as exc:  # noqa: BLE001
+        logger.debug("Failed to fetch full text %s: %s", url, exc)
+        return None
+
+    try:
+        if parse_pool is not None:
+            text, images = await parse_pool.run(extract_article, html, profile)
+        else:
+            text, images = extract_article(html, profile)
+    except Exception as exc:  # noqa: BLE001
+        logger.debug("Failed to parse full text %s: %s", url, exc)
+        return None
+    return CachedPage(text, images, etag=resp.headers.get("etag"), last_modified=resp.headers.get("last-modified"))
+
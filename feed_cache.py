@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from core.models import SourceConfig
+from storage import connect
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FeedValidators:
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    body_hash: Optional[str] = None
+
+    def request_headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def body_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class FeedCache:
+    """
+    Persistent per-source HTTP validators (ETag / Last-Modified) and body hash.
+
+    New validators are staged while a source is processed and only committed
+    once the source finished, so a failed cycle never hides items from the next.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._conn = connect(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS feed_validators (
+                source TEXT NOT NULL,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (source, url)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS feed_watermarks (
+                source TEXT NOT NULL,
+                url TEXT NOT NULL,
+                watermark REAL NOT NULL,
+                PRIMARY KEY (source, url)
+            )
+            """
+        )
+        self._pending: Dict[Tuple[str, str], FeedValidators] = {}
+
+    @staticmethod
+    def _key(source: SourceConfig) -> Tuple[str, str]:
+        return source.name, source.rss_url or ""
+
+    def get(self, source: SourceConfig) -> Optional[FeedValidators]:
+        row = self._conn.execute(
+            "SELECT etag, last_modified, body_hash FROM feed_validators WHERE source = ? AND url = ?",
+            self._key(source),
+        ).fetchone()
+        if row is None:
+            return None
+        return FeedValidators(etag=row[0], last_modified=row[1], body_hash=row[2])
+
+    def stage(self, source: SourceConfig, validators: FeedValidators) -> None:
+        self._pending[self._key(source)] = validators
+
+    def commit(self, source: SourceConfig) -> None:
+        key = self._key(source)
+        validators = self._pending.pop(key, None)
+        if validators is None:
+            return
+        self._conn.execute(
+            """
+            INSERT INTO feed_validators (source, url, etag, last_modified, body_hash, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (source, url) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                body_hash = excluded.body_hash,
+                updated_at = excluded.updated_at
+            """,
+            (*key, validators.etag, validators.last_modified, validators.body_hash, time.time()),
+        )
+
+    def discard(self, source: SourceConfig) -> None:
+        self._pending.pop(self._key(source), None)
+
+    def get_watermark(self, source: SourceConfig) -> Optional[datetime]:
+        """Publication date below which the source's items are known to be handled."""
+        row = self._conn.execute(
+            "SELECT watermark FROM feed_watermarks WHERE source = ? AND url = ?", self._key(source)
+        ).fetchone()
+        return datetime.fromtimestamp(row[0], tz=timezone.utc) if row else None
+
+    def set_watermark(self, source: SourceConfig, watermark: datetime) -> None:
+        self._conn.execute(
+            """
+            INSERT INTO feed_watermarks (source, url, watermark) VALUES (?, ?, ?)
+            ON CONFLICT (source, url) DO UPDATE SET watermark = excluded.watermark
+            """,
+            (*self._key(source), watermark.timestamp()),
+        )
+
+    def close(self) -> None:
+        self._conn.close()
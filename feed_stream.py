@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+try:  # lxml's pull parser knows more encodings (windows-1251, koi8-r) and recovers from junk
+    from lxml import etree as _etree  # type: ignore
+
+    _LXML = True
+except Exception:  # pragma: no cover - depends on environment
+    import xml.etree.ElementTree as _etree  # type: ignore
+
+    _LXML = False
+
+logger = logging.getLogger(__name__)
+
+NS_CONTENT = "http://purl.org/rss/1.0/modules/content/"
+NS_MEDIA = "http://search.yahoo.com/mrss/"
+NS_YANDEX = "http://news.yandex.ru"
+
+ENTRY_TAGS = frozenset(("item", "entry"))
+
+
+class FeedStreamError(Exception):
+    """The feed cannot be parsed incrementally; callers fall back to feedparser."""
+
+
+def _split(tag: Any) -> tuple[str, str]:
+    if not isinstance(tag, str):
+        return "", ""
+    if tag.startswith("{"):
+        ns, _, local = tag[1:].partition("}")
+        return ns, local
+    return "", tag
+
+
+def _text(elem: Any) -> str:
+    return "".join(elem.itertext()).strip()
+
+
+def _parse_date(raw: str) -> Optional[datetime]:
+    raw = raw.strip()
+    if not raw:
+        return None
+    try:
+        parsed = parsedate_to_datetime(raw)
+    except Exception:
+        try:
+            parsed = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+        except Exception:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def entry_to_dict(elem: Any) -> Dict[str, Any]:
+    """Map an RSS <item> / Atom <entry> element to the feedparser-style keys normalize_entry reads."""
+    entry: Dict[str, Any] = {}
+    tags: List[Dict[str, str]] = []
+    media_content: List[Dict[str, str]] = []
+    media_thumbnail: List[Dict[str, str]] = []
+    enclosures: List[Dict[str, str]] = []
+
+    for child in elem.iter():
+        if child is elem:
+            continue
+        ns, local = _split(child.tag)
+        if ns == NS_MEDIA:
+            if local == "content" and child.get("url"):
+                media_content.append({"url": child.get("url"), "type": child.get("type") or ""})
+            elif local == "thumbnail" and child.get("url"):
+                media_thumbnail.append({"url": child.get("url")})
+            continue
+        if ns == NS_CONTENT and local == "encoded":
+            entry["content"] = [{"value": _text(child)}]
+        elif ns == NS_YANDEX and local == "full-text":
+            entry["yandex_fulltext"] = _text(child)
+        elif local == "title" and "title" not in entry:
+            entry["title"] = _text(child)
+        elif local == "link":
+            href = child.get("href")
+            rel = child.get("rel") or "alternate"
+            if href is None:
+                entry.setdefault("link", _text(child))
+            elif rel == "enclosure":
+                enclosures.append({"href": href, "type": child.get("type") or ""})
+            elif rel == "alternate":
+                entry.setdefault("link", href)
+        elif local in ("description", "summary"):
+            entry.setdefault("summary", _text(child))
+            entry.setdefault("description", entry["summary"])
+        elif local == "content" and "content" not in entry:
+            entry["content"] = [{"value": _text(child)}]
+        elif local in ("pubDate", "published", "updated", "date"):
+            key = "updated" if local == "updated" else "published"
+            entry.setdefault(key, _text(child))
+        elif local == "category":
+            term = child.get("term") or _text(child)
+            if term:
+                tags.append({"term": term})
+        elif local == "enclosure" and child.get("url"):
+            enclosures.append({"href": child.get("url"), "type": child.get("type") or ""})
+        elif local in ("guid", "id"):
+            entry.setdefault("id", _text(child))
+
+    for key in ("published", "updated"):
+        parsed = _parse_date(entry.get(key) or "")
+        if parsed is not None:
+            entry[f"{key}_parsed"] = parsed.timetuple()
+    if tags:
+        entry["tags"] = tags
+    if media_content:
+        entry["media_content"] = media_content
+    if media_thumbnail:
+        entry["media_thumbnail"] = media_thumbnail
+    if enclosures:
+        entry["enclosures"] = enclosures
+    return entry
+
+
+class FeedStreamParser:
+    """
+    Incremental RSS/Atom parser. Feed it chunks as they arrive and it yields
+    one entry dict per completed <item>/<entry>; each element is freed right
+    after it is converted, so only one entry is held in memory at a time.
+    """
+
+    def __init__(self) -> None:
+        if _LXML:
+            self._parser = _etree.XMLPullParser(events=("start", "end"), recover=True, resolve_entities=False)
+        else:
+            self._parser = _etree.XMLPullParser(events=("start", "end"))
+        self._stack: List[Any] = []
+
+    def feed(self, chunk: bytes) -> Iterator[Dict[str, Any]]:
+        try:
+            self._parser.feed(chunk)
+        except Exception as exc:  # noqa: BLE001
+            raise FeedStreamError(str(exc)) from exc
+        return self._drain()
+
+    def close(self) -> Iterator[Dict[str, Any]]:
+        try:
+            self._parser.close()
+        except Exception as exc:  # noqa: BLE001
+            raise FeedStreamError(str(exc)) from exc
+        return self._drain()
+
+    def _drain(self) -> Iterator[Dict[str, Any]]:
+        try:
+            events = list(self._parser.read_events())
+        except Exception as exc:  # noqa: BLE001
+            raise FeedStreamError(str(exc)) from exc
+        for event, elem in events:
+            if event == "start":
+                self._stack.append(elem)
+                continue
+            if self._stack:
+                self._stack.pop()
+            if _split(elem.tag)[1] not in ENTRY_TAGS:
+                continue
+            entry = entry_to_dict(elem)
+            elem.clear()
+            if self._stack:
+                try:
+                    self._stack[-1].remove(elem)
+                except ValueError:
+                    pass
+            yield entry
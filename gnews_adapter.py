@@ -1,73 +1,346 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import logging
+import os
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict, List
-
-import httpx
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from core.models import NewsItem, SourceConfig
-from core.normalizer import normalize_entry
+from core.normalizer import normalize_entries
+from host_guard import CircuitOpenError
+from http_transport import get_transport
+from metrics import CALLS_SAVED, GNEWS_REQUESTS, RETRIES, stage_timer
+from storage import connect
 
 logger = logging.getLogger(__name__)
 
-GNEWS_URL = "https://gnews.io/api/v4/top-headlines"
+GNEWS_URL = os.getenv("GNEWS_URL", "https://gnews.io/api/v4/top-headlines")
 BACKOFF_BASE = 2
+DAY_SECONDS = 24 * 3600
+# GNews answers 403 once the token's daily quota is used up.
+QUOTA_EXCEEDED_STATUS = 403
 
+PageKey = Tuple[str, Tuple[Tuple[str, str], ...], int]
 
-async def fetch_and_parse_gnews(source: SourceConfig, request_timeout: int, max_retries: int) -> List[NewsItem]:
-    articles = await _fetch_json(source, request_timeout, max_retries)
-    entries = [_to_entry_dict(article, source) for article in articles]
-    items = [normalize_entry(entry, source.name) for entry in entries]
-    return items
 
+class QuotaBudget:
+    """
+    Daily request quota of one API token, released evenly over the UTC day:
+    tokens accrue at `daily_limit / 86400` per second up to `burst`, and no
+    more than `daily_limit` requests go out per day whatever the bucket holds.
+    """
 
-def _build_params(source: SourceConfig) -> Dict[str, Any]:
-    params = {
-        "token": source.api_token or source.params.get("api_token"),
-        "lang": source.params.get("lang", "en"),
-        "max": source.params.get("max", 50),
-    }
-    if topic := source.params.get("topic"):
-        params["topic"] = topic
-    if query := source.params.get("q"):
-        params["q"] = query
-    return params
+    def __init__(self, daily_limit: int, burst: int, clock: Callable[[], float] = time.time) -> None:
+        self.daily_limit = max(1, daily_limit)
+        self.burst = float(max(1, min(burst, self.daily_limit)))
+        self.rate = self.daily_limit / DAY_SECONDS
+        self.clock = clock
+        self.day = self._today()
+        self.used = 0
+        self.tokens = self.burst
+        self.updated = clock()
+
+    def _today(self) -> str:
+        return datetime.fromtimestamp(self.clock(), timezone.utc).strftime("%Y-%m-%d")
+
+    def restore(self, day: str, used: int, tokens: float, updated: float) -> None:
+        self.day, self.used, self.tokens, self.updated = day, used, tokens, updated
+
+    def _refill(self) -> None:
+        now = self.clock()
+        today = self._today()
+        if today != self.day:
+            self.day = today
+            self.used = 0
+        self.tokens = min(self.burst, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self.used >= self.daily_limit or self.tokens < 1:
+            return False
+        self.tokens -= 1
+        self.used += 1
+        return True
+
+    def exhaust(self) -> None:
+        """The API says the quota is gone: stop until the next UTC day."""
+        self._refill()
+        self.used = self.daily_limit
 
+    @property
+    def remaining(self) -> int:
+        self._refill()
+        return max(0, self.daily_limit - self.used)
+
+
+def source_queries(source: SourceConfig) -> List[Dict[str, Any]]:
+    """
+    Parameter sets of the source: `topic` and `q` together, as one request
+    (the query within the topic), then one per entry of `topics` and of
+    `queries`; plain top headlines when it has none of them.
+    """
+    params = source.params
+    base: Dict[str, Any] = {"lang": params.get("lang", "en"), "max": params.get("max", 50)}
+    if country := params.get("country"):
+        base["country"] = country
+    variants: List[Dict[str, Any]] = []
+    combined = {key: params[key] for key in ("topic", "q") if params.get(key)}
+    if combined:
+        variants.append(combined)
+    variants += [{"topic": topic} for topic in params.get("topics") or []]
+    variants += [{"q": query} for query in params.get("queries") or []]
+    unique = {tuple(sorted(variant.items())): variant for variant in variants}
+    return [{**base, **variant} for variant in unique.values()] or [base]
+
+
+class GNewsClient:
+    """
+    GNews API client shared by all GNews sources.
+
+    Identical requests (same token, parameters and page) are made once:
+    concurrent ones share the in-flight call and later ones within
+    `cache_ttl` seconds get the cached response. Every call spends one
+    token of the API token's QuotaBudget; with the budget empty, sources get
+    what the cache has and the rest waits for a later poll. With a path,
+    quota usage survives restarts and is shared by sharded workers.
+    """
+
+    def __init__(
+        self,
+        url: str = GNEWS_URL,
+        daily_quota: int = 100,
+        quota_burst: int = 10,
+        cache_ttl: float = 600.0,
+        path: Optional[Path] = None,
+    ) -> None:
+        self.url = url
+        self.daily_quota = daily_quota
+        self.quota_burst = quota_burst
+        self.cache_ttl = cache_ttl
+        self._cache: Dict[PageKey, Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[PageKey, asyncio.Task] = {}
+        self._budgets: Dict[str, QuotaBudget] = {}
+        self._conn = None
+        if path is not None:
+            self._conn = connect(path)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS gnews_quota (
+                    token_hash TEXT PRIMARY KEY,
+                    day TEXT NOT NULL,
+                    used INTEGER NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
 
-async def _fetch_json(source: SourceConfig, request_timeout: int, max_retries: int) -> List[Dict[str, Any]]:
-    params = _build_params(source)
-    if not params.get("token"):
-        raise ValueError(f"GNews source {source.name} requires api_token")
+    @staticmethod
+    def _token_hash(token: str) -> str:
+        return hashlib.blake2b(token.encode("utf-8"), digest_size=8).hexdigest()
 
-    attempt = 0
-    last_err: Exception | None = None
-    async with httpx.AsyncClient(timeout=request_timeout) as client:
+    def budget(self, token: str) -> QuotaBudget:
+        budget = self._budgets.get(token)
+        if budget is None:
+            budget = QuotaBudget(self.daily_quota, self.quota_burst)
+            self._load_budget(token, budget)
+            self._budgets[token] = budget
+        return budget
+
+    def _load_budget(self, token: str, budget: QuotaBudget) -> None:
+        if self._conn is not None:
+            row = self._conn.execute(
+                "SELECT day, used, tokens, updated_at FROM gnews_quota WHERE token_hash = ?",
+                (self._token_hash(token),),
+            ).fetchone()
+            if row is not None:
+                budget.restore(*row)
+
+    def _acquire(self, token: str) -> bool:
+        """Spend one request of the token's budget; atomic across processes sharing the store."""
+        budget = self.budget(token)
+        if self._conn is None:
+            return budget.try_acquire()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._load_budget(token, budget)
+            acquired = budget.try_acquire()
+            self._save_budget(token, budget)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return acquired
+
+    def _save_budget(self, token: str, budget: QuotaBudget) -> None:
+        if self._conn is not None:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO gnews_quota (token_hash, day, used, tokens, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (self._token_hash(token), budget.day, budget.used, budget.tokens, budget.updated),
+            )
+
+    async def fetch_articles(
+        self, source: SourceConfig, request_timeout: int, max_retries: int
+    ) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """(article, query params) pairs over all of the source's queries and pages, without repeats."""
+        token = source.api_token or source.params.get("api_token")
+        if not token:
+            raise ValueError(f"GNews source {source.name} requires api_token")
+        pages = max(1, int(source.params.get("pages", 1)))
+        results = await asyncio.gather(
+            *(
+                self._fetch_query(source.name, token, params, pages, request_timeout, max_retries)
+                for params in source_queries(source)
+            )
+        )
+        articles: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        seen_urls = set()
+        for params, batch in results:
+            for article in batch:
+                url = article.get("url")
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+                articles.append((article, params))
+        return articles
+
+    async def _fetch_query(
+        self,
+        source_name: str,
+        token: str,
+        params: Dict[str, Any],
+        pages: int,
+        request_timeout: int,
+        max_retries: int,
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        articles: List[Dict[str, Any]] = []
+        per_page = int(params["max"])
+        for page in range(1, pages + 1):
+            data = await self.fetch_page(source_name, token, params, page, request_timeout, max_retries)
+            if data is None:
+                break
+            batch = data.get("articles") or []
+            articles.extend(batch)
+            total = data.get("totalArticles")
+            if len(batch) < per_page or (isinstance(total, int) and page * per_page >= total):
+                break
+        return params, articles
+
+    async def fetch_page(
+        self,
+        source_name: str,
+        token: str,
+        params: Dict[str, Any],
+        page: int,
+        request_timeout: int,
+        max_retries: int,
+    ) -> Optional[Dict[str, Any]]:
+        """One page of results; None when the quota budget has nothing left for it."""
+        key: PageKey = (token, tuple(sorted((k, str(v)) for k, v in params.items())), page)
+        cached = self._cache.get(key)
+        if cached is not None and time.time() - cached[0] < self.cache_ttl:
+            GNEWS_REQUESTS.inc(result="cached")
+            CALLS_SAVED.inc(source=source_name, kind="gnews")
+            return cached[1]
+        task = self._inflight.get(key)
+        if task is not None:
+            GNEWS_REQUESTS.inc(result="coalesced")
+            CALLS_SAVED.inc(source=source_name, kind="gnews")
+        else:
+            task = asyncio.create_task(self._request(source_name, token, params, page, request_timeout, max_retries))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # A source timing out must not cancel a call other sources are waiting for.
+        return await asyncio.shield(task)
+
+    def _finish(self, key: PageKey, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or task.result() is None:
+            return
+        now = time.time()
+        for stale in [k for k, (fetched_at, _) in self._cache.items() if now - fetched_at >= self.cache_ttl]:
+            del self._cache[stale]
+        self._cache[key] = (now, task.result())
+
+    async def _request(
+        self,
+        source_name: str,
+        token: str,
+        params: Dict[str, Any],
+        page: int,
+        request_timeout: int,
+        max_retries: int,
+    ) -> Optional[Dict[str, Any]]:
+        budget = self.budget(token)
+        query = {**params, "token": token}
+        if page > 1:
+            query["page"] = page
+        attempt = 0
+        last_err: Exception | None = None
+        transport = get_transport()
         while attempt < max_retries:
             attempt += 1
+            if not self._acquire(token):
+                GNEWS_REQUESTS.inc(result="budget")
+                logger.info(
+                    "GNews quota budget empty (%d of %d left today), skipping a request for %s",
+                    budget.remaining,
+                    budget.daily_limit,
+                    source_name,
+                )
+                return None
+            GNEWS_REQUESTS.inc(result="sent")
             try:
-                resp = await client.get(GNEWS_URL, params=params)
+                resp = await transport.get(self.url, params=query, timeout=request_timeout)
+                if resp.status_code == QUOTA_EXCEEDED_STATUS:
+                    budget.exhaust()
+                    self._save_budget(token, budget)
+                    logger.warning("GNews reports the daily quota exhausted (%s)", source_name)
+                    return None
                 resp.raise_for_status()
-                data = resp.json()
-                return data.get("articles", [])
+                return resp.json()
+            except CircuitOpenError:
+                raise
             except Exception as exc:  # noqa: BLE001
                 last_err = exc
+                if attempt < max_retries:
+                    RETRIES.inc(source=source_name, kind="gnews")
                 delay = BACKOFF_BASE ** (attempt - 1)
                 logger.warning(
                     "GNews attempt %d/%d failed for %s: %s (sleep %ss)",
                     attempt,
                     max_retries,
-                    source.name,
+                    source_name,
                     exc,
                     delay,
                 )
                 await asyncio.sleep(delay)
-    assert last_err is not None
-    raise last_err
+        assert last_err is not None
+        raise last_err
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+
+
+async def fetch_and_parse_gnews(
+    source: SourceConfig, request_timeout: int, max_retries: int, client: GNewsClient | None = None
+) -> List[NewsItem]:
+    client = client or GNewsClient()
+    with stage_timer(source.name, "download"):
+        articles = await client.fetch_articles(source, request_timeout, max_retries)
+    with stage_timer(source.name, "normalize"):
+        entries = [_to_entry_dict(article, params) for article, params in articles]
+        items = normalize_entries(entries, source.name)
+    return items
 
 
-def _to_entry_dict(article: Dict[str, Any], source: SourceConfig) -> Dict[str, Any]:
+def _to_entry_dict(article: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
     published = article.get("publishedAt")
     # normalize ISO with Z
     if isinstance(published, str) and published.endswith("Z"):
@@ -86,7 +359,7 @@ def _to_entry_dict(article: Dict[str, Any], source: SourceConfig) -> Dict[str, A
         "link": article.get("url"),
         "tags": [],
     }
-    if topic := source.params.get("topic"):
+    if topic := params.get("topic"):
         entry["tags"].append(topic)
     if src := (article.get("source") or {}).get("name"):
         entry["tags"].append(src)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The host is known to be failing (or asked us to back off); no request was sent."""
+
+    def __init__(self, host: str, retry_in: float) -> None:
+        super().__init__(f"circuit open for {host}, next probe in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    Closed: requests flow, consecutive failures are counted. After
+    `failure_threshold` of them the circuit opens and requests fail instantly
+    for `reset_timeout` seconds. Then it is half-open: a single probe goes
+    through; success closes the circuit, failure reopens it with the timeout
+    doubled (up to `max_reset_timeout`). A 429/503 Retry-After opens it for
+    the time the server asked for.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        max_reset_timeout: float = 1800.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.host = host
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max(reset_timeout, max_reset_timeout)
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.throttled = False  # open because the server asked (Retry-After), not because it failed
+        self._timeout = reset_timeout
+        self._open_until = 0.0
+        self._probing = False
+
+    def retry_in(self) -> float:
+        """Seconds until the next request may go out (0 when it may go now)."""
+        if self.state == OPEN:
+            return max(0.0, self._open_until - self.clock())
+        if self.state == HALF_OPEN and self._probing:
+            return self._timeout
+        return 0.0
+
+    def before_request(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent now."""
+        if self.state == OPEN:
+            if self.clock() < self._open_until:
+                raise CircuitOpenError(self.host, self.retry_in())
+            self.state = HALF_OPEN
+            logger.info("Circuit for %s half-open, probing", self.host)
+        if self.state == HALF_OPEN:
+            if self._probing:
+                raise CircuitOpenError(self.host, self._timeout)
+            self._probing = True
+
+    def release(self) -> None:
+        """The request ended without saying anything about the host (cancelled, bad body)."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info("Circuit for %s closed", self.host)
+        self.state = CLOSED
+        self.failures = 0
+        self.throttled = False
+        self._timeout = self.reset_timeout
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._probing = False
+        if self.state == HALF_OPEN:
+            self._timeout = min(self._timeout * 2, self.max_reset_timeout)
+            self._open(self._timeout)
+            return
+        self.failures += 1
+        if self.state == CLOSED and self.failures >= self.failure_threshold:
+            self._open(self._timeout)
+
+    def block(self, seconds: float) -> None:
+        """Server asked us to back off (Retry-After)."""
+        self._probing = False
+        self._open(min(max(seconds, 0.0), self.max_reset_timeout))
+        self.throttled = True
+
+    def _open(self, seconds: float) -> None:
+        self.throttled = False
+        if self.state != OPEN:
+            logger.warning("Circuit for %s opened for %.0fs", self.host, seconds)
+        self.state = OPEN
+        self._open_until = self.clock() + seconds
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds from now; accepts delta-seconds and HTTP dates."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except Exception:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
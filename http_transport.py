@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from host_guard import CircuitBreaker, CircuitOpenError, TokenBucket, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10
+# Statuses that say something about the host's health (4xx are about the URL).
+BACKOFF_STATUSES = {429, 503}
+
+
+class HttpTransport:
+    """
+    Long-lived, connection-pooled HTTP client shared by all fetchers.
+
+    Wraps a single `httpx.AsyncClient` so feeds, GNews, article pages and the
+    backend reuse keep-alive connections instead of opening a new TCP+TLS
+    session per request. Concurrent requests to one host are capped by
+    `per_host_limit`.
+
+    Every host also gets a circuit breaker (failing hosts are skipped with
+    CircuitOpenError instead of being retried) and, unless exempt, a token
+    bucket of `host_rate` requests per second. 429/503 with Retry-After
+    opens the host's circuit for the requested time; waits of up to
+    `retry_after_max_wait` seconds are slept through instead.
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        per_host_limit: int = 6,
+        http2: bool = False,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        max_reset_timeout: float = 1800.0,
+        host_rate: float = 0.0,
+        host_burst: float = 10.0,
+        retry_after_max_wait: float = 5.0,
+        exempt_hosts: Iterable[str] = (),
+    ) -> None:
+        if http2:
+            try:
+                import h2  # type: ignore  # noqa: F401
+            except Exception:
+                logger.warning("HTTP/2 requested but 'h2' is not installed, falling back to HTTP/1.1")
+                http2 = False
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.per_host_limit = max(1, per_host_limit)
+        self._client = httpx.AsyncClient(timeout=timeout, limits=limits, http2=http2)
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.retry_after_max_wait = retry_after_max_wait
+        self.exempt_hosts = {host.lower() for host in exempt_hosts}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._rejected = 0
+        self._requests = 0
+        self._new_connections = 0
+        self._tls_handshakes = 0
+        self._errors = 0
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        sem = self._host_semaphores.get(host)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_host_limit)
+            self._host_semaphores[host] = sem
+        return sem
+
+    def exempt(self, url_or_host: str) -> None:
+        """Never rate-limit this host (our own backend)."""
+        self.exempt_hosts.add(urlsplit(url_or_host).netloc.lower() or url_or_host.lower())
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(host, self.failure_threshold, self.reset_timeout, self.max_reset_timeout)
+            self._breakers[host] = breaker
+        return breaker
+
+    async def _admit(self, host: str) -> CircuitBreaker:
+        """Wait for the host's circuit and rate limit; raises CircuitOpenError to skip it."""
+        breaker = self.breaker(host)
+        if breaker.throttled:
+            wait = breaker.retry_in()
+            if 0 < wait <= self.retry_after_max_wait:
+                await asyncio.sleep(wait)
+        try:
+            breaker.before_request()
+        except CircuitOpenError:
+            self._rejected += 1
+            raise
+        if self.host_rate > 0 and host not in self.exempt_hosts:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+            try:
+                await bucket.acquire()
+            except BaseException:
+                # cancelled while waiting for a token: give the half-open probe back
+                breaker.release()
+                raise
+        return breaker
+
+    @staticmethod
+    def _record(breaker: CircuitBreaker, resp: httpx.Response) -> None:
+        if resp.status_code in BACKOFF_STATUSES:
+            retry_after = parse_retry_after(resp.headers.get("retry-after"))
+            if retry_after is not None:
+                breaker.block(retry_after)
+                return
+        if resp.status_code >= 500 or resp.status_code == 429:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        # httpcore only emits connect events when the pool has no idle connection to reuse.
+        if event_name == "connection.connect_tcp.complete":
+            self._new_connections += 1
+        elif event_name == "connection.start_tls.complete":
+            self._tls_handshakes += 1
+
+    def _with_trace(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions.setdefault("trace", self._trace)
+        kwargs["extensions"] = extensions
+        return kwargs
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request and read the whole response body."""
+        host = urlsplit(url).netloc.lower()
+        breaker = await self._admit(host)
+        try:
+            async with self._semaphore(host):
+                self._requests += 1
+                try:
+                    resp = await self._client.request(method, url, **self._with_trace(kwargs))
+                except httpx.TransportError:
+                    self._errors += 1
+                    breaker.record_failure()
+                    raise
+                except Exception:
+                    self._errors += 1
+                    raise
+        finally:
+            breaker.release()
+        self._record(breaker, resp)
+        return resp
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        """Open a streaming response; the host slot is held until the body is consumed."""
+        host = urlsplit(url).netloc.lower()
+        breaker = await self._admit(host)
+        try:
+            async with self._semaphore(host):
+                self._requests += 1
+                try:
+                    async with self._client.stream(method, url, **self._with_trace(kwargs)) as resp:
+                        self._record(breaker, resp)
+                        yield resp
+                except httpx.TransportError:
+                    self._errors += 1
+                    breaker.record_failure()
+                    raise
+                except Exception:
+                    self._errors += 1
+                    raise
+        finally:
+            breaker.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool statistics: how many requests reused an already open connection."""
+        reused = max(0, self._requests - self._new_connections)
+        return {
+            "requests": self._requests,
+            "new_connections": self._new_connections,
+            "tls_handshakes": self._tls_handshakes,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / self._requests, 3) if self._requests else 0.0,
+            "errors": self._errors,
+            "hosts": len(self._host_semaphores),
+            "open_circuits": sum(1 for breaker in self._breakers.values() if breaker.state != "closed"),
+            "rejected": self._rejected,
+            "http2": self.http2,
+        }
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_transport: Optional[HttpTransport] = None
+
+
+def configure_transport(**kwargs: Any) -> HttpTransport:
+    """Create the process-wide transport with explicit settings (see HttpTransport)."""
+    global _transport
+    _transport = HttpTransport(**kwargs)
+    return _transport
+
+
+def get_transport() -> HttpTransport:
+    """Return the process-wide transport, creating one with defaults if needed."""
+    global _transport
+    if _transport is None:
+        _transport = HttpTransport()
+    return _transport
+
+
+async def close_transport() -> None:
+    global _transport
+    if _transport is not None:
+        await _transport.aclose()
+        _transport = None
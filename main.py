@@ -1,15 +1,54 @@
 from __future__ import annotations
 
+import argparse
 import asyncio
 import logging
 import os
-from typing import List
+import signal
+import socket
+import sqlite3
+import sys
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Set, Tuple
+from pathlib import Path
+from urllib.parse import urlsplit
 
+import metrics
 from backend_client import BackendClient
 from config_loader import load_sources
-from core.models import SourceConfig
-from gnews_adapter import fetch_and_parse_gnews
+from context import ParserContext
+from core.extraction import ExtractionProfile
+from core.models import NewsItem, SourceConfig, SourceRunStats
+from core.serialization import encode_payload
+from delivery import DeliveryJob, DeliveryPipeline
+from enrichment import Enricher
+from feed_cache import FeedCache
+from host_guard import CircuitOpenError
+from http_transport import HttpTransport, close_transport, configure_transport, get_transport
+from page_cache import PageCache
+from parse_pool import ParsePool
+from profiler import CycleProfiler
 from rss_parser import fetch_and_parse
+from scheduler import SourceScheduler
+from seen_index import SeenIndex
+from sharding import ShardCoordinator, default_worker_id
+from sinks import FanoutSink, JsonlSink, Sink, SQLiteSink
+from spool import OutboundSpool
+from storage import state_path
+
+# Optional components (GNews, near-duplicate index, worker processes)
+# are imported where they are built, so runs that don't use them start faster.
+
+
+WORKER_CHECK_SECONDS = 5
+SHARD_SPOOL_PREFIX = "outbound_spool-"
+
+EXIT_OK = 0
+EXIT_FAILED = 1  # some source failed or some items could not be delivered
+EXIT_USAGE = 2  # bad arguments or config, nothing was run
+
+SINK_NAMES = ("http", "jsonl", "sqlite")
 
 
 def env_int(key: str, default: int) -> int:
@@ -19,75 +58,799 @@ def env_int(key: str, default: int) -> int:
         return default
 
 
+def env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, default))
+    except Exception:
+        return default
+
+
+def env_bool(key: str, default: bool) -> bool:
+    val = os.getenv(key)
+    if val is None:
+        return default
+    return val.strip().lower() in ("1", "true", "yes", "on")
+
+
 def get_config():
     return {
         "sleep_seconds": env_int("SLEEP_SECONDS", 300),
+        "poll_min_seconds": env_int("POLL_MIN_SECONDS", 60),
+        "poll_max_seconds": env_int("POLL_MAX_SECONDS", 1800),
+        "poll_target_new_items": env_int("POLL_TARGET_NEW_ITEMS", 2),
+        "config_reload_seconds": max(1, env_int("CONFIG_RELOAD_SECONDS", 30)),
         "request_timeout": env_int("REQUEST_TIMEOUT", 10),
         "max_retries": env_int("MAX_RETRIES", 3),
+        "source_concurrency": max(1, env_int("SOURCE_CONCURRENCY", 4)),
+        "source_timeout": env_int("SOURCE_TIMEOUT", 180),
+        "http_max_connections": env_int("HTTP_MAX_CONNECTIONS", 100),
+        "http_max_keepalive": env_int("HTTP_MAX_KEEPALIVE", 20),
+        "http_keepalive_expiry": env_int("HTTP_KEEPALIVE_EXPIRY", 30),
+        "http_per_host_limit": env_int("HTTP_PER_HOST_LIMIT", 6),
+        "http2": env_bool("HTTP2", False),
+        "http_host_rate": env_float("HTTP_HOST_RATE", 5.0),
+        "http_host_burst": env_float("HTTP_HOST_BURST", 10.0),
+        "retry_after_max_wait": env_float("RETRY_AFTER_MAX_WAIT", 5.0),
+        "circuit_failure_threshold": env_int("CIRCUIT_FAILURE_THRESHOLD", 5),
+        "circuit_reset_seconds": env_float("CIRCUIT_RESET_SECONDS", 60.0),
+        "circuit_max_reset_seconds": env_float("CIRCUIT_MAX_RESET_SECONDS", 1800.0),
+        "feed_cache": env_bool("FEED_CACHE", True),
+        "seen_index": env_bool("SEEN_INDEX", True),
+        "seen_ttl_seconds": env_int("SEEN_TTL_SECONDS", 7 * 24 * 3600),
+        "enrich_concurrency": env_int("ENRICH_CONCURRENCY", 8),
+        "enrich_per_host": env_int("ENRICH_PER_HOST", 2),
+        "enrich_deadline": env_int("ENRICH_DEADLINE", 30),
+        "gnews_daily_quota": env_int("GNEWS_DAILY_QUOTA", 100),
+        "gnews_quota_burst": env_int("GNEWS_QUOTA_BURST", 10),
+        "gnews_cache_ttl_seconds": env_int("GNEWS_CACHE_TTL_SECONDS", 600),
+        "page_cache": env_bool("PAGE_CACHE", True),
+        "page_cache_ttl_seconds": env_int("PAGE_CACHE_TTL_SECONDS", 6 * 3600),
+        "page_cache_max_mb": env_int("PAGE_CACHE_MAX_MB", 64),
+        "page_cache_memory_entries": env_int("PAGE_CACHE_MEMORY_ENTRIES", 1000),
+        "parse_workers": env_int("PARSE_WORKERS", 0),
+        "parse_executor": os.getenv("PARSE_EXECUTOR", "process").strip().lower(),
+        "feed_streaming": env_bool("FEED_STREAMING", False),
         "backend_base_url": os.getenv("BACKEND_BASE_URL", "http://localhost:8080"),
         "backend_endpoint": os.getenv("BACKEND_SAVE_NEWS_ENDPOINT", "/test/save_news"),
+        "backend_batch_endpoint": os.getenv("BACKEND_BATCH_ENDPOINT", "/test/save_news_batch"),
+        "backend_batch_size": env_int("BACKEND_BATCH_SIZE", 20),
+        "backend_inflight_window": env_int("BACKEND_INFLIGHT_WINDOW", 4),
+        "sinks": [name.strip().lower() for name in os.getenv("SINKS", "http").split(",") if name.strip()] or ["http"],
+        "sink_jsonl_path": os.getenv("SINK_JSONL_PATH", ""),
+        "sink_sqlite_path": os.getenv("SINK_SQLITE_PATH", ""),
+        "delivery_workers": env_int("DELIVERY_WORKERS", 2),
+        "delivery_queue_size": max(1, env_int("DELIVERY_QUEUE_SIZE", 8)),
+        "outbound_spool": env_bool("OUTBOUND_SPOOL", True),
+        "spool_replay_seconds": max(1, env_int("SPOOL_REPLAY_SECONDS", 60)),
+        "near_dup_mode": os.getenv("NEAR_DUP_MODE", "off").strip().lower(),
+        "near_dup_threshold": env_float("NEAR_DUP_THRESHOLD", 0.7),
+        "near_dup_window_seconds": env_int("NEAR_DUP_WINDOW_SECONDS", 6 * 3600),
+        "near_dup_persist": env_bool("NEAR_DUP_PERSIST", True),
+        "metrics_host": os.getenv("METRICS_HOST", "127.0.0.1"),
+        "metrics_port": env_int("METRICS_PORT", 0),
+        "sharding": env_bool("SHARDING", False),
+        "worker_id": os.getenv("WORKER_ID") or default_worker_id(),
+        "shard_db": os.getenv("SHARD_DB", ""),
+        "shard_lease_seconds": env_int("SHARD_LEASE_SECONDS", 60),
+        "profile": env_bool("PROFILE", False),
+        "profile_dir": os.getenv("PROFILE_DIR", ""),
+        "profile_sample_ms": max(1, env_int("PROFILE_SAMPLE_MS", 5)),
+        "profile_top": max(1, env_int("PROFILE_TOP", 25)),
+        "profile_max_seconds": env_int("PROFILE_MAX_SECONDS", 600),
+        "profile_cprofile": env_bool("PROFILE_CPROFILE", True),
         "log_level": os.getenv("LOG_LEVEL", "INFO").upper(),
     }
 
 
-async def process_source(source: SourceConfig, client: BackendClient, cfg: dict) -> None:
+def build_context(cfg: dict) -> ParserContext:
+    parse_pool = None
+    if cfg["parse_workers"] > 0:
+        parse_pool = ParsePool(cfg["parse_workers"], kind=cfg["parse_executor"])
+    page_cache = None
+    if cfg["page_cache"]:
+        page_cache = PageCache(
+            state_path("page_cache.sqlite"),
+            ttl_seconds=cfg["page_cache_ttl_seconds"],
+            max_bytes=cfg["page_cache_max_mb"] * 1024 * 1024,
+            memory_entries=cfg["page_cache_memory_entries"],
+        )
+    ctx = ParserContext(
+        enricher=Enricher(
+            cfg["request_timeout"],
+            concurrency=cfg["enrich_concurrency"],
+            per_host=cfg["enrich_per_host"],
+            deadline=cfg["enrich_deadline"],
+            parse_pool=parse_pool,
+            page_cache=page_cache,
+        ),
+        parse_pool=parse_pool,
+        page_cache=page_cache,
+    )
+    if cfg["feed_cache"]:
+        ctx.feed_cache = FeedCache(state_path("feed_cache.sqlite"))
+    if cfg["seen_index"]:
+        ctx.seen_index = SeenIndex(state_path("seen_index.sqlite"), ttl_seconds=cfg["seen_ttl_seconds"])
+    if cfg["outbound_spool"]:
+        # Sharded workers each keep their own spool; spools of workers that left
+        # the ring (without WORKER_ID the id changes on restart) are adopted.
+        name = f"{SHARD_SPOOL_PREFIX}{cfg['worker_id']}.jsonl" if cfg["sharding"] else "outbound_spool.jsonl"
+        ctx.spool = OutboundSpool(state_path(name))
+    if cfg["sharding"]:
+        ctx.shard = ShardCoordinator(
+            Path(cfg["shard_db"]) if cfg["shard_db"] else state_path("shards.sqlite"),
+            worker_id=cfg["worker_id"],
+            lease_seconds=cfg["shard_lease_seconds"],
+        )
+    if cfg["near_dup_mode"] != "off":
+        from dedup import NearDuplicateIndex
+
+        ctx.near_dup = NearDuplicateIndex(
+            threshold=cfg["near_dup_threshold"],
+            window_seconds=cfg["near_dup_window_seconds"],
+            path=state_path("near_dup.sqlite") if cfg["near_dup_persist"] else None,
+            mode=cfg["near_dup_mode"],
+        )
+    ctx.profiler = CycleProfiler(
+        Path(cfg["profile_dir"]) if cfg["profile_dir"] else state_path("profiles"),
+        sample_interval=cfg["profile_sample_ms"] / 1000,
+        top=cfg["profile_top"],
+        max_seconds=cfg["profile_max_seconds"],
+        enable_cprofile=cfg["profile_cprofile"],
+    )
+    if cfg["profile"]:
+        ctx.profiler.request()
+    return ctx
+
+
+def build_sink(cfg: dict, transport: HttpTransport) -> Sink:
+    """The sinks named in SINKS; several are fanned out, the first one answers for delivery."""
+    sinks: List[Sink] = []
+    for name in cfg["sinks"]:
+        if name == "http":
+            sinks.append(
+                BackendClient(
+                    base_url=cfg["backend_base_url"],
+                    endpoint=cfg["backend_endpoint"],
+                    timeout=cfg["request_timeout"],
+                    transport=transport,
+                    batch_endpoint=cfg["backend_batch_endpoint"],
+                )
+            )
+        elif name == "jsonl":
+            sinks.append(JsonlSink(Path(cfg["sink_jsonl_path"]) if cfg["sink_jsonl_path"] else state_path("news.jsonl")))
+        elif name == "sqlite":
+            sinks.append(
+                SQLiteSink(Path(cfg["sink_sqlite_path"]) if cfg["sink_sqlite_path"] else state_path("news.sqlite"))
+            )
+        else:
+            raise ValueError(f"unknown sink {name!r}, expected one of: {', '.join(SINK_NAMES)}")
+    return sinks[0] if len(sinks) == 1 else FanoutSink(sinks)
+
+
+def start_delivery(client: Sink, cfg: dict, ctx: ParserContext) -> None:
+    """Attach the delivery pipeline to the context (DELIVERY_WORKERS=0 keeps inline delivery)."""
+    if cfg["delivery_workers"] <= 0:
+        return
+    timeout = cfg["source_timeout"] if cfg["source_timeout"] > 0 else None
+
+    async def deliver(job: DeliveryJob) -> SourceRunStats:
+        return await asyncio.wait_for(
+            deliver_source(job.source, job.items, job.stream, client, cfg, ctx), timeout=timeout
+        )
+
+    ctx.delivery = DeliveryPipeline(deliver, workers=cfg["delivery_workers"], queue_size=cfg["delivery_queue_size"])
+    ctx.delivery.start()
+
+
+async def _send_chunk(
+    source: SourceConfig, client: Sink, payloads: List[bytes], batch: bool
+) -> List[bool | None]:
+    with metrics.stage_timer(source.name, "deliver"):
+        if batch:
+            return await client.save_news_batch(payloads)
+        return [await client.save_news(payloads[0])]
+
+
+async def deliver_items(
+    source: SourceConfig, items_sorted: List[NewsItem], client: Sink, cfg: dict, ctx: ParserContext
+) -> SourceRunStats:
+    """
+    Send date-sorted items to the backend, `backend_batch_size` per request,
+    and stop the source at the first created=false (or already seen item).
+    Items the backend failed on go to the outbound spool, if there is one.
+
+    The newest item always goes alone: in steady state it is the duplicate
+    that stops the source, and a full batch would only waste enrichment.
+    After it, up to `backend_inflight_window` requests are sent ahead of
+    their answers. Answers are still handled in date order: once one says
+    created=false, the answers for requests sent after it are discarded,
+    so the source stops exactly where it would have stopped without the window.
+    """
+    seen = ctx.seen_index
+    spool = ctx.spool
+    dedup = ctx.near_dup.check(source.name) if ctx.near_dup is not None else None
+    stats = SourceRunStats(name=source.name, fetched=len(items_sorted))
+
+    def skipped(item: NewsItem) -> bool:
+        return (spool is not None and spool.contains(item)) or (dedup is not None and dedup.suppressed(item))
+
+    session = None
+    if ctx.enricher is not None and source.type != "gnews":
+        session = ctx.enricher.session(
+            items_sorted,
+            source.name,
+            stop_at=seen.contains if seen else None,
+            profile=ExtractionProfile.from_params(source.params),
+            skip=skipped,
+        )
+
+    index = 0
+    sent = 0
+    exhausted = False
+
+    async def next_chunk() -> Tuple[List[NewsItem], int]:
+        """The next items to send together and the batch size they were picked for."""
+        nonlocal index, exhausted
+        batch_size = max(1, cfg["backend_batch_size"]) if sent and client.batch_supported is not False else 1
+        chunk: List[NewsItem] = []
+        while index < len(items_sorted) and len(chunk) < batch_size:
+            item = items_sorted[index]
+            if seen is not None and seen.contains(item):
+                # Same outcome as a created=false answer, without the round-trip.
+                metrics.ITEMS.inc(source=source.name, result="seen")
+                logging.info("Item already delivered, stopping source %s", source.name)
+                exhausted = True
+                break
+            if spool is not None and spool.contains(item):
+                # Already enriched and waiting for replay; neither a stop nor a resend.
+                index += 1
+                continue
+            duplicate = dedup.match(item) if dedup is not None else None
+            if duplicate is not None:
+                metrics.NEAR_DUPLICATES.inc(source=source.name, action=ctx.near_dup.mode)
+                if dedup.suppressed(item):
+                    metrics.CALLS_SAVED.inc(source=source.name, kind="backend")
+                    if session is not None and Enricher.needs_enrichment(item):
+                        metrics.CALLS_SAVED.inc(source=source.name, kind="enrich")
+                    logging.info(
+                        "Skipping near duplicate in %s of %s item (%.2f): %s",
+                        source.name,
+                        duplicate.source,
+                        duplicate.similarity,
+                        item.header,
+                    )
+                    index += 1
+                    continue
+                tag = f"near-duplicate:{duplicate.source}"
+                if tag not in item.hashtags:
+                    item.hashtags.append(tag)
+            if session is not None:
+                await session.ready(index)
+            chunk.append(item)
+            index += 1
+        if index >= len(items_sorted):
+            exhausted = True
+        return chunk, batch_size
+
+    def handle(chunk: List[NewsItem], payloads: List[bytes], results: List[bool | None]) -> bool:
+        """Record one request's answers; True when the source has to stop."""
+        for item, result in zip(chunk, results):
+            stats.record(item, result)
+            metrics.record_result(source.name, result)
+            if result is not None and seen is not None:
+                seen.mark(item)
+            if result and dedup is not None:
+                dedup.register(item)
+        if spool is not None:
+            spool.add_many(
+                [(item, payload) for item, payload, result in zip(chunk, payloads, results) if result is None]
+            )
+
+        for pos, result in enumerate(results):
+            if result is False:
+                logging.info("Backend returned created=false, stopping source %s", source.name)
+                if pos + 1 < len(results):
+                    logging.info(
+                        "Ignoring %d later batch results for %s after created=false",
+                        len(results) - pos - 1,
+                        source.name,
+                    )
+                return True
+
+            if result is None:
+                logging.warning(
+                    "Backend error for %s, %s", source.name, "item spooled for replay" if spool else "continuing"
+                )
+                continue
+
+            logging.info("Sent news to backend (source=%s, created=True)", source.name)
+        return False
+
+    in_flight: Deque[Tuple[List[NewsItem], List[bytes], asyncio.Task]] = deque()
+    try:
+        window = 1
+        while True:
+            while not exhausted and len(in_flight) < window:
+                chunk, batch_size = await next_chunk()
+                if not chunk:
+                    continue
+                sent += len(chunk)
+                payloads = [encode_payload(item) for item in chunk]
+                task = asyncio.create_task(_send_chunk(source, client, payloads, batch_size > 1))
+                in_flight.append((chunk, payloads, task))
+            if not in_flight:
+                break
+            chunk, payloads, task = in_flight.popleft()
+            if handle(chunk, payloads, await task):
+                break
+            window = max(1, cfg["backend_inflight_window"])
+        if in_flight:
+            # Sent ahead of the created=false answer: the stop point wins, their answers are dropped.
+            discarded = sum(len(chunk) for chunk, _, _ in in_flight)
+            await asyncio.gather(*(task for _, _, task in in_flight), return_exceptions=True)
+            in_flight.clear()
+            logging.info("Discarded %d speculative results for %s after created=false", discarded, source.name)
+    finally:
+        for _, _, task in in_flight:
+            task.cancel()
+        if session is not None:
+            await session.close()
+    return stats
+
+
+def _stream_stop_at(source: SourceConfig, ctx: ParserContext):
+    """Where a streamed feed can stop: an already delivered item or one below the watermark."""
+    seen = ctx.seen_index
+    watermark = ctx.feed_cache.get_watermark(source) if ctx.feed_cache is not None else None
+
+    def stop_at(item: NewsItem) -> bool:
+        if watermark is not None and item.date < watermark:
+            return True
+        return seen is not None and seen.contains(item)
+
+    return stop_at
+
+
+async def fetch_source(source: SourceConfig, cfg: dict, ctx: ParserContext) -> Tuple[List[NewsItem], bool]:
+    """Fetch and parse one source; returns its items and whether the feed was streamed."""
     logging.info("Processing source: %s", source.name)
+    stream = bool(source.params.get("stream", cfg["feed_streaming"]))
     if source.type == "gnews":
+        from gnews_adapter import GNewsClient, fetch_and_parse_gnews
+
+        if ctx.gnews is None:
+            # one client per process: it coalesces requests and keeps the token quota
+            ctx.gnews = GNewsClient(
+                daily_quota=cfg["gnews_daily_quota"],
+                quota_burst=cfg["gnews_quota_burst"],
+                cache_ttl=cfg["gnews_cache_ttl_seconds"],
+                path=state_path("gnews.sqlite"),
+            )
         items = await fetch_and_parse_gnews(
-            source, request_timeout=cfg["request_timeout"], max_retries=cfg["max_retries"]
+            source, request_timeout=cfg["request_timeout"], max_retries=cfg["max_retries"], client=ctx.gnews
         )
     else:
         items = await fetch_and_parse(
-            source, request_timeout=cfg["request_timeout"], max_retries=cfg["max_retries"]
+            source,
+            request_timeout=cfg["request_timeout"],
+            max_retries=cfg["max_retries"],
+            feed_cache=ctx.feed_cache,
+            parse_pool=ctx.parse_pool,
+            stream=stream,
+            stop_at=_stream_stop_at(source, ctx) if stream else None,
         )
+    return items, stream
+
 
+async def deliver_source(
+    source: SourceConfig, items: List[NewsItem], stream: bool, client: Sink, cfg: dict, ctx: ParserContext
+) -> SourceRunStats:
+    """Deliver fetched items, then commit the feed validators and watermark."""
     items_sorted = sorted(items, key=lambda i: i.date, reverse=True)
+    stats = await deliver_items(source, items_sorted, client, cfg, ctx)
+
+    if ctx.feed_cache is not None:
+        ctx.feed_cache.commit(source)
+        watermark = stats.watermark()
+        if stream and watermark is not None:
+            previous = ctx.feed_cache.get_watermark(source)
+            if stats.oldest_failed is None and previous is not None:
+                watermark = max(watermark, previous)
+            ctx.feed_cache.set_watermark(source, watermark)
+    logging.info("Finished source: %s", source.name)
+    return stats
+
+
+async def process_source(
+    source: SourceConfig, client: Sink, cfg: dict, ctx: ParserContext | None = None
+) -> SourceRunStats:
+    ctx = ctx or ParserContext()
+    items, stream = await fetch_source(source, cfg, ctx)
+    if ctx.delivery is not None:
+        job = await ctx.delivery.submit(source, items, stream)
+        return await job.done
+    return await deliver_source(source, items, stream, client, cfg, ctx)
+
+
+async def _run_source_guarded(
+    source: SourceConfig,
+    client: Sink,
+    cfg: dict,
+    ctx: ParserContext,
+    semaphore: asyncio.Semaphore,
+) -> SourceRunStats | None:
+    """
+    Run one source under the global concurrency limit and its timeout budget.
+    Any failure is logged and never propagates to the other sources.
+    Returns None when the source failed or timed out.
+
+    With a delivery pipeline the fetch slot is released as soon as the items
+    are queued (waiting while the queue is full); delivery happens in a worker.
+    """
+    timeout = cfg["source_timeout"] if cfg["source_timeout"] > 0 else None
+    with metrics.stage_timer(source.name, "total"):
+        async with semaphore:
+            try:
+                if ctx.delivery is None:
+                    return await asyncio.wait_for(process_source(source, client, cfg, ctx), timeout=timeout)
+                items, stream = await asyncio.wait_for(fetch_source(source, cfg, ctx), timeout=timeout)
+                job = await ctx.delivery.submit(source, items, stream)
+            except asyncio.TimeoutError:
+                logging.warning("Source %s exceeded timeout of %ss, skipping", source.name, timeout)
+                return None
+            except CircuitOpenError as exc:
+                logging.info("Source %s skipped: %s", source.name, exc)
+                return None
+            except Exception as exc:  # noqa: BLE001
+                logging.warning("Source %s failed: %s", source.name, exc)
+                return None
+        try:
+            return await job.done
+        except Exception as exc:  # noqa: BLE001
+            logging.warning("Source %s delivery failed: %s", source.name, exc)
+            return None
+
+
+async def run_cycle(
+    sources: List[SourceConfig], client: Sink, cfg: dict, ctx: ParserContext
+) -> List[SourceRunStats | None]:
+    """
+    Process all sources concurrently, at most `source_concurrency` at a time.
+    With `source_concurrency=1` sources run one after another as before.
+    Returns each source's stats, None for the ones that failed.
+    """
+    semaphore = asyncio.Semaphore(cfg["source_concurrency"])
+    return await asyncio.gather(*(_run_source_guarded(source, client, cfg, ctx, semaphore) for source in sources))
+
+
+async def _run_scheduled(
+    source: SourceConfig,
+    client: Sink,
+    cfg: dict,
+    ctx: ParserContext,
+    semaphore: asyncio.Semaphore,
+    scheduler: SourceScheduler,
+) -> None:
+    """Run one due source; whatever happens, it ends back on the schedule."""
+    ran = False
+    created: int | None = None
+    try:
+        if ctx.shard is not None:
+            try:
+                acquired = ctx.shard.acquire(source.name)
+            except Exception as exc:  # noqa: BLE001
+                logging.warning("Cannot take the lease of %s (%s), postponing", source.name, exc)
+                return
+            if not acquired:
+                logging.info("Source %s is leased by another worker, postponing", source.name)
+                return
+            refresh_shared_indexes(ctx)
+        ran = True
+        try:
+            stats = await _run_source_guarded(source, client, cfg, ctx, semaphore)
+            created = stats.created if stats is not None else None
+        finally:
+            if ctx.shard is not None:
+                try:
+                    ctx.shard.release(source.name)
+                except Exception as exc:  # noqa: BLE001
+                    # the lease runs out after SHARD_LEASE_SECONDS anyway
+                    logging.warning("Cannot release the lease of %s: %s", source.name, exc)
+    finally:
+        try:
+            if ran:
+                scheduler.record(source.name, created)
+            else:
+                scheduler.postpone(source.name)
+        except Exception as exc:  # noqa: BLE001
+            logging.error("Rescheduling %s failed (%s), postponing", source.name, exc)
+            scheduler.postpone(source.name)
+        if ctx.profiler is not None:
+            ctx.profiler.source_done(source.name)
+
 
-    for item in items_sorted:
-        payload = {
-            "title": item.header,
-            "body": item.text,
-            "source": item.source_name,
-            "hash_tags": item.hashtags,
-            "published_at": item.date.isoformat(),
-        }
-        result = await client.save_news(payload)
-
-        if result is False:
-            logging.info("Backend returned created=false, stopping source %s", source.name)
-            break
-
-        if result is None:
-            logging.warning("Backend error for %s, continuing", source.name)
+def refresh_shared_indexes(ctx: ParserContext) -> None:
+    """
+    Pick up what the other workers delivered since the last pass. The seen
+    and near-duplicate indexes live in STATE_DIR files the workers share, but
+    each one keeps an in-memory view that only its own deliveries update.
+    """
+    for index in (ctx.seen_index, ctx.near_dup):
+        if index is None:
             continue
+        try:
+            index.refresh()
+        except Exception as exc:  # noqa: BLE001
+            logging.warning("Refreshing %s failed: %s", type(index).__name__, exc)
 
-        logging.info("Sent news to backend (source=%s, created=True)", source.name)
 
-    logging.info("Finished source: %s", source.name)
+def adopt_orphan_spools(cfg: dict, ctx: ParserContext) -> None:
+    """
+    Take over the spools of sharded workers that are no longer in the ring,
+    so their items are replayed by someone. A spool is claimed by renaming
+    it, which only one worker can do; logs touched within the lease period
+    belong to a worker that may not have announced itself yet.
+    """
+    live = set(ctx.shard.members) | {cfg["worker_id"]}
+    cutoff = time.time() - ctx.shard.lease_seconds
+    for path in ctx.spool.path.parent.glob(f"{SHARD_SPOOL_PREFIX}*.jsonl"):
+        owner = path.name[len(SHARD_SPOOL_PREFIX) : -len(".jsonl")]
+        if owner in live:
+            continue
+        # still matches the glob: if we die while adopting, another worker takes it over
+        claimed = path.with_name(f"{SHARD_SPOOL_PREFIX}{owner}+{cfg['worker_id']}.jsonl")
+        try:
+            if path.stat().st_mtime > cutoff:
+                continue
+            path.rename(claimed)
+            os.utime(claimed)
+            adopted = ctx.spool.adopt(claimed)
+            claimed.unlink()
+        except OSError as exc:
+            logging.warning("Cannot adopt spool %s: %s", path.name, exc)
+            continue
+        logging.info("Adopted %d spooled items of departed worker %s", adopted, owner)
 
 
-async def main() -> None:
-    cfg = get_config()
-    setup_logging(cfg["log_level"])
-    logging.info("Parser started")
-    client = BackendClient(
-        base_url=cfg["backend_base_url"],
-        endpoint=cfg["backend_endpoint"],
-        timeout=cfg["request_timeout"],
+async def _replay_spool(client: Sink, cfg: dict, ctx: ParserContext) -> None:
+    try:
+        await ctx.spool.replay(client, ctx.seen_index, cfg["backend_batch_size"])
+    except Exception as exc:  # noqa: BLE001
+        logging.warning("Spool replay failed: %s", exc)
+
+
+async def run_once(
+    client: Sink, cfg: dict, ctx: ParserContext, source_names: List[str] | None = None
+) -> int:
+    """
+    One cycle over the enabled sources (or only `source_names`) for cron and
+    short-lived containers, then one spool replay. Returns the exit code.
+    """
+    try:
+        sources = load_sources()
+    except Exception as exc:  # noqa: BLE001
+        logging.error("Failed to load sources config: %s", exc)
+        return EXIT_USAGE
+    if source_names:
+        known = {source.name for source in sources}
+        unknown = [name for name in source_names if name not in known]
+        if unknown:
+            logging.error("Unknown or disabled sources: %s", ", ".join(unknown))
+            return EXIT_USAGE
+        sources = [source for source in sources if source.name in source_names]
+    if not sources:
+        logging.error("No enabled sources in config")
+        return EXIT_USAGE
+
+    if ctx.profiler is not None:
+        ctx.profiler.maybe_start(source.name for source in sources)
+    results = await run_cycle(sources, client, cfg, ctx)
+    if ctx.profiler is not None:
+        ctx.profiler.finish()
+    if ctx.spool is not None and len(ctx.spool):
+        await _replay_spool(client, cfg, ctx)
+
+    failed = [source.name for source, stats in zip(sources, results) if stats is None]
+    done = [stats for stats in results if stats is not None]
+    errors = sum(stats.errors for stats in done)
+    # spooled items are retried by the next run; without a spool they are lost
+    undelivered = len(ctx.spool) if ctx.spool is not None else errors
+    logging.info(
+        "Cycle finished: %d sources, %d failed, %d created, %d duplicates, %d undelivered",
+        len(sources),
+        len(failed),
+        sum(stats.created for stats in done),
+        sum(stats.duplicates for stats in done),
+        undelivered,
+    )
+    if failed:
+        logging.warning("Failed sources: %s", ", ".join(failed))
+    return EXIT_FAILED if failed or undelivered else EXIT_OK
+
+
+async def run_scheduler(client: Sink, cfg: dict, ctx: ParserContext) -> None:
+    """
+    Poll every source on its own adaptive schedule, reloading the config
+    every `config_reload_seconds` without a restart. A sharded worker only
+    schedules the sources the hash ring gives it and re-splits them as
+    soon as a worker joins or disappears.
+    """
+    scheduler = SourceScheduler(
+        default_interval=cfg["sleep_seconds"],
+        min_interval=cfg["poll_min_seconds"],
+        max_interval=cfg["poll_max_seconds"],
+        target_new_items=cfg["poll_target_new_items"],
     )
+    semaphore = asyncio.Semaphore(cfg["source_concurrency"])
+    running: Set[asyncio.Task] = set()
+    replay: asyncio.Task | None = None
+    loop = asyncio.get_running_loop()
+    next_reload = 0.0
+    next_heartbeat = 0.0
+    next_replay = loop.time() + cfg["spool_replay_seconds"]
+    next_stats_log = loop.time() + cfg["sleep_seconds"]
     try:
         while True:
-            logging.info("Starting new parsing iteration")
-            sources: List[SourceConfig] = load_sources()
-            for source in sources:
+            now = loop.time()
+            if ctx.shard is not None and now >= next_heartbeat:
+                try:
+                    if ctx.shard.heartbeat():
+                        next_reload = now
+                        if ctx.spool is not None:
+                            adopt_orphan_spools(cfg, ctx)
+                except Exception as exc:  # noqa: BLE001
+                    logging.warning("Shard heartbeat failed: %s", exc)
+                next_heartbeat = now + ctx.shard.heartbeat_seconds
+            if now >= next_reload:
                 try:
-                    await process_source(source, client, cfg)
+                    sources = load_sources()
+                    scheduler.sync(ctx.shard.assigned(sources) if ctx.shard is not None else sources)
                 except Exception as exc:  # noqa: BLE001
-                    logging.warning("Source %s failed: %s", source.name, exc)
-            logging.info("Sleeping for %s seconds", cfg["sleep_seconds"])
-            await asyncio.sleep(cfg["sleep_seconds"])
+                    logging.warning("Failed to reload sources config: %s", exc)
+                next_reload = now + cfg["config_reload_seconds"]
+            if ctx.profiler is not None:
+                ctx.profiler.maybe_start(scheduler.names())
+                ctx.profiler.maybe_finish()
+
+            for source in scheduler.pop_due():
+                task = asyncio.create_task(_run_scheduled(source, client, cfg, ctx, semaphore, scheduler))
+                running.add(task)
+                task.add_done_callback(running.discard)
+
+            if ctx.seen_index is not None:
+                ctx.seen_index.maybe_compact()
+            if ctx.near_dup is not None:
+                ctx.near_dup.maybe_compact()
+            if ctx.page_cache is not None:
+                ctx.page_cache.maybe_compact()
+            if ctx.spool is not None and now >= next_replay:
+                if len(ctx.spool) and (replay is None or replay.done()):
+                    replay = asyncio.create_task(_replay_spool(client, cfg, ctx))
+                next_replay = now + cfg["spool_replay_seconds"]
+            if now >= next_stats_log:
+                logging.info("HTTP pool stats: %s", get_transport().stats())
+                next_stats_log = now + cfg["sleep_seconds"]
+
+            wakeups = [next_reload]
+            if ctx.spool is not None:
+                wakeups.append(next_replay)
+            if ctx.shard is not None:
+                wakeups.append(next_heartbeat)
+            wait = max(0.0, min(wakeups) - loop.time())
+            until_due = scheduler.seconds_until_next()
+            if until_due is not None:
+                wait = min(wait, until_due)
+            if running:
+                # Wake up early when a source finishes: it is rescheduled on completion.
+                await asyncio.wait(set(running), timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+            else:
+                await asyncio.sleep(wait)
+    finally:
+        if replay is not None:
+            running.add(replay)
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+
+def _register_transport_gauges() -> None:
+    keys = (
+        "requests",
+        "new_connections",
+        "tls_handshakes",
+        "reused_connections",
+        "reuse_ratio",
+        "errors",
+        "open_circuits",
+        "rejected",
+    )
+    for key in keys:
+        gauge = metrics.REGISTRY.gauge(f"parser_http_{key}", f"HTTP transport {key.replace('_', ' ')}.")
+        gauge.set_function(lambda key=key: get_transport().stats()[key])
+
+
+async def start_metrics(cfg: dict) -> asyncio.AbstractServer | None:
+    """Expose Prometheus metrics on METRICS_HOST:METRICS_PORT (METRICS_PORT=0 disables the endpoint)."""
+    _register_transport_gauges()
+    if cfg["metrics_port"] <= 0:
+        return None
+    try:
+        return await metrics.start_metrics_server(cfg["metrics_host"], cfg["metrics_port"])
+    except OSError as exc:
+        logging.warning("Failed to start metrics endpoint: %s", exc)
+        return None
+
+
+def transport_options(cfg: dict) -> Dict[str, Any]:
+    """HttpTransport settings from the config; our own backend is never rate-limited."""
+    return {
+        "timeout": cfg["request_timeout"],
+        "max_connections": cfg["http_max_connections"],
+        "max_keepalive_connections": cfg["http_max_keepalive"],
+        "keepalive_expiry": cfg["http_keepalive_expiry"],
+        "per_host_limit": cfg["http_per_host_limit"],
+        "http2": cfg["http2"],
+        "failure_threshold": cfg["circuit_failure_threshold"],
+        "reset_timeout": cfg["circuit_reset_seconds"],
+        "max_reset_timeout": cfg["circuit_max_reset_seconds"],
+        "host_rate": cfg["http_host_rate"],
+        "host_burst": cfg["http_host_burst"],
+        "retry_after_max_wait": cfg["retry_after_max_wait"],
+        "exempt_hosts": [urlsplit(cfg["backend_base_url"]).netloc],
+    }
+
+
+def _install_profile_signal(ctx: ParserContext) -> None:
+    """`kill -USR1 <pid>` profiles the next cycle."""
+    if ctx.profiler is None or not hasattr(signal, "SIGUSR1"):
+        return
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, ctx.profiler.request)
+    except (NotImplementedError, RuntimeError) as exc:
+        logging.warning("Cannot install SIGUSR1 profiling handler: %s", exc)
+
+
+async def main(once: bool = False, source_names: List[str] | None = None) -> int:
+    """Run the scheduler forever, or with `once` a single cycle; returns the exit code."""
+    cfg = get_config()
+    setup_logging(cfg["log_level"])
+    if once:
+        # a one-shot run processes exactly what it was asked to, it is never a shard
+        cfg["sharding"] = False
+        logging.info("Parser started for one cycle")
+    else:
+        logging.info("Parser started" + (f" as shard worker {cfg['worker_id']}" if cfg["sharding"] else ""))
+    transport = configure_transport(**transport_options(cfg))
+    try:
+        client = build_sink(cfg, transport)
+    except (ValueError, OSError, sqlite3.Error) as exc:
+        logging.error("Cannot open output sinks %s: %s", ",".join(cfg["sinks"]), exc)
+        await close_transport()
+        return EXIT_USAGE
+    logging.info("Delivering to %s", ", ".join(cfg["sinks"]))
+    ctx = build_context(cfg)
+    start_delivery(client, cfg, ctx)
+    metrics_server = None
+    lag_monitor = None
+    try:
+        if once:
+            return await run_once(client, cfg, ctx, source_names)
+        metrics_server = await start_metrics(cfg)
+        _install_profile_signal(ctx)
+        lag_monitor = asyncio.create_task(metrics.monitor_loop_lag())
+        await run_scheduler(client, cfg, ctx)
+        return EXIT_OK
     finally:
+        if lag_monitor is not None:
+            lag_monitor.cancel()
+        if metrics_server is not None:
+            metrics_server.close()
+        if ctx.delivery is not None:
+            await ctx.delivery.close()
         await client.close()
+        await close_transport()
+        ctx.close()
 
 
 def setup_logging(level: str) -> None:
@@ -99,5 +862,103 @@ def setup_logging(level: str) -> None:
     )
 
 
+def _run_worker(index: int, worker_id: str) -> None:
+    os.environ["SHARDING"] = "1"
+    os.environ["WORKER_ID"] = worker_id
+    metrics_port = env_int("METRICS_PORT", 0)
+    if metrics_port > 0:
+        os.environ["METRICS_PORT"] = str(metrics_port + index)
+    # Let the event loop unwind on terminate so leases and state are released.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+def run_workers(count: int) -> None:
+    """
+    Run `count` sharded parser processes on this machine and restart any
+    that die. More machines join by running with SHARDING=1 and a shared
+    SHARD_DB.
+    """
+    import multiprocessing
+
+    setup_logging(get_config()["log_level"])
+    host = socket.gethostname()
+    worker_ids = [f"{host}-{index}" for index in range(count)]
+
+    def start(index: int) -> multiprocessing.Process:
+        process = multiprocessing.Process(target=_run_worker, args=(index, worker_ids[index]), name=worker_ids[index])
+        process.start()
+        return process
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    processes = [start(index) for index in range(count)]
+    logging.info("Started %d parser workers", count)
+    try:
+        while True:
+            time.sleep(WORKER_CHECK_SECONDS)
+            for index, process in enumerate(processes):
+                if not process.is_alive():
+                    logging.warning("Worker %s exited with code %s, restarting", worker_ids[index], process.exitcode)
+                    processes[index] = start(index)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(30)
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="News parser")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=env_int("WORKERS", 1),
+        help="sharded parser processes to run on this machine (default: 1, no sharding)",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="run one cycle and exit: 0 if every source succeeded, 1 on failures, 2 on a bad config",
+    )
+    parser.add_argument(
+        "--source",
+        action="append",
+        dest="sources",
+        metavar="NAME",
+        help="only run this source (repeatable); implies --once",
+    )
+    parser.add_argument(
+        "--sink",
+        action="append",
+        dest="sinks",
+        choices=SINK_NAMES,
+        help="deliver to this sink instead of SINKS (repeatable: the first one answers, the rest get copies)",
+    )
+    args = parser.parse_args(argv)
+    if args.sources:
+        args.once = True
+    if args.once and args.workers > 1:
+        parser.error("--once runs in a single process, drop --workers")
+    return args
+
+
+def cli() -> None:
+    args = parse_args()
+    if args.sinks:
+        # through the environment, so worker processes pick it up too
+        os.environ["SINKS"] = ",".join(args.sinks)
+    if args.workers > 1:
+        run_workers(args.workers)
+    elif args.once:
+        sys.exit(asyncio.run(main(once=True, source_names=args.sources)))
+    else:
+        asyncio.run(main())
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    cli()
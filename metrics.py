@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in self._values.items()]
+
+    def snapshot(self) -> Dict[str, float]:
+        return {",".join(k) or "": v for k, v in self._values.items()}
+
+
+class Gauge(_Metric):
+    """Gauge set explicitly or read from a callback at collection time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def _collect(self) -> Dict[LabelValues, float]:
+        if self._function is not None:
+            try:
+                return {(): float(self._function())}
+            except Exception:  # noqa: BLE001
+                logger.debug("Gauge %s callback failed", self.name, exc_info=True)
+                return {}
+        return dict(self._values)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in self._collect().items()]
+
+    def snapshot(self) -> Dict[str, float]:
+        return {",".join(k) or "": v for k, v in self._collect().items()}
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            counts[idx] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def count(self, **labels: Any) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def quantile(self, q: float, **labels: Any) -> Optional[float]:
+        """Estimate a quantile from the buckets (linear interpolation, like histogram_quantile)."""
+        counts = self._counts.get(self._key(labels))
+        if not counts:
+            return None
+        total = sum(counts)
+        rank = q * total
+        seen = 0
+        lower = 0.0
+        for idx, count in enumerate(counts):
+            upper = self.buckets[idx] if idx < len(self.buckets) else lower
+            if seen + count >= rank and count:
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return lower
+
+    def render(self) -> List[str]:
+        lines: List[str] = []
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            plain = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{plain} {_format_value(self._sums[key])}")
+            lines.append(f"{self.name}_count{plain} {cumulative}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        result: Dict[str, Dict[str, float]] = {}
+        for key, counts in self._counts.items():
+            labels = dict(zip(self.labelnames, key))
+            total = sum(counts)
+            result[",".join(key)] = {
+                "count": total,
+                "sum": self._sums[key],
+                "p50": self.quantile(0.5, **labels) or 0.0,
+                "p99": self.quantile(0.99, **labels) or 0.0,
+            }
+        return result
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls: type, name: str, *args: Any, **kwargs: Any) -> Any:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} already registered as {metric.kind}")
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            body = metric.render()  # type: ignore[attr-defined]
+            if body:
+                lines.extend(metric.header())
+                lines.extend(body)
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}  # type: ignore[attr-defined]
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "parser_stage_seconds",
+    "Time spent per source and pipeline stage (download, parse, normalize, enrich, deliver, total).",
+    ("source", "stage"),
+)
+BYTES_DOWNLOADED = REGISTRY.counter("parser_bytes_downloaded_total", "Feed bytes downloaded.", ("source",))
+ITEMS = REGISTRY.counter(
+    "parser_items_total", "Items by delivery outcome (created, duplicate, error, seen).", ("source", "result")
+)
+NEAR_DUPLICATES = REGISTRY.counter(
+    "parser_near_duplicates_total", "Items matching another source's story, by action (tag, suppress).", ("source", "action")
+)
+CALLS_SAVED = REGISTRY.counter(
+    "parser_calls_saved_total", "Backend posts and page fetches skipped for suppressed duplicates.", ("source", "kind")
+)
+PAGE_CACHE = REGISTRY.counter(
+    "parser_page_cache_total", "Article page lookups by outcome (hit, revalidated, miss).", ("source", "result")
+)
+GNEWS_REQUESTS = REGISTRY.counter(
+    "parser_gnews_requests_total", "GNews page lookups by outcome (sent, cached, coalesced, budget).", ("result",)
+)
+SINK_ERRORS = REGISTRY.counter(
+    "parser_sink_errors_total", "Items a fan-out sink failed to copy to one of its other sinks.", ("sink",)
+)
+RETRIES = REGISTRY.counter("parser_retries_total", "Fetch attempts that failed and were retried.", ("source", "kind"))
+LOOP_LAG = REGISTRY.histogram(
+    "parser_event_loop_lag_seconds",
+    "How late the event loop woke up a periodic probe.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+StageListener = Callable[[str, str, float], None]
+_stage_listeners: List[StageListener] = []
+
+
+def add_stage_listener(listener: StageListener) -> None:
+    """Call `listener(source, stage, seconds)` for every recorded stage (benchmarks, profiling)."""
+    _stage_listeners.append(listener)
+
+
+def remove_stage_listener(listener: StageListener) -> None:
+    if listener in _stage_listeners:
+        _stage_listeners.remove(listener)
+
+
+def observe_stage(source: str, stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, source=source, stage=stage)
+    for listener in _stage_listeners:
+        listener(source, stage, seconds)
+
+
+@contextmanager
+def stage_timer(source: str, stage: str) -> Iterator[None]:
+    """Record wall time of a block under parser_stage_seconds{source, stage}."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(source, stage, time.perf_counter() - started)
+
+
+def record_result(source: str, result: Optional[bool]) -> None:
+    if result is None:
+        ITEMS.inc(source=source, result="error")
+    else:
+        ITEMS.inc(source=source, result="created" if result else "duplicate")
+
+
+def snapshot() -> Dict[str, Any]:
+    """In-process view of every metric (histograms with count/sum/p50/p99)."""
+    return REGISTRY.snapshot()
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
+
+
+async def monitor_loop_lag(interval: float = 0.5) -> None:
+    """Sleep `interval` in a loop and record how much later than asked the loop woke us."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(max(0.0, loop.time() - started - interval))
+
+
+async def _handle_http(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        while True:  # drain headers
+            line = await asyncio.wait_for(reader.readline(), timeout=5)
+            if line in (b"\r\n", b"\n", b""):
+                break
+        parts = request_line.decode("latin-1").split()
+        path = parts[1] if len(parts) > 1 else "/"
+        if path.split("?", 1)[0] == "/metrics":
+            status, body = "200 OK", render_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            status, body, content_type = "404 Not Found", b"not found\n", "text/plain"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await writer.drain()
+    except Exception as exc:  # noqa: BLE001
+        logger.debug("Metrics request failed: %s", exc)
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: str, port: int) -> asyncio.AbstractServer:
+    """Serve GET /metrics in Prometheus text format."""
+    server = await asyncio.start_server(_handle_http, host, port)
+    logger.info("Metrics endpoint listening on http://%s:%s/metrics", host, port)
+    return server
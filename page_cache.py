@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from core.extraction import DEFAULT_PROFILE, ExtractionProfile
+from storage import connect
+
+logger = logging.getLogger(__name__)
+
+COMPACT_EVERY_SECONDS = 600
+# Entries with an ETag / Last-Modified stay revalidatable this many TTLs after the last fetch.
+REVALIDATE_TTLS = 4
+TRACKING_PARAMS = {"fbclid", "gclid", "yclid", "ysclid", "mc_cid", "mc_eid", "_openstat"}
+_DEFAULT_PORTS = {"http": ":80", "https": ":443"}
+
+
+def canonical_url(url: str) -> str:
+    """Same article, same key: lowercase scheme/host, no fragment, default port or tracking params, sorted query."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if netloc.endswith(_DEFAULT_PORTS.get(scheme, "\0")):
+        netloc = netloc.rsplit(":", 1)[0]
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+def profile_key(profile: ExtractionProfile) -> str:
+    """Extraction depends on the source's profile, so it is part of the cache key."""
+    if profile == DEFAULT_PROFILE:
+        return ""
+    return hashlib.blake2b(repr(profile).encode("utf-8"), digest_size=6).hexdigest()
+
+
+@dataclass
+class CachedPage:
+    text: str
+    images: List[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = field(default_factory=time.time)
+
+    def request_headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    @property
+    def size(self) -> int:
+        """Bytes the page takes in the cache file (UTF-8), what PAGE_CACHE_MAX_MB caps."""
+        return len(self.text.encode("utf-8")) + sum(len(image.encode("utf-8")) for image in self.images)
+
+
+class PageCache:
+    """
+    Extracted article text and images, keyed by canonical URL and profile.
+
+    Two tiers: an in-memory LRU of `memory_entries` pages in front of a
+    SQLite table capped at `max_bytes` (least recently used pages go first).
+    A page younger than `ttl_seconds` is served without touching the
+    network; an older one with validators is revalidated with a
+    conditional GET, and a 304 keeps the cached extraction.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl_seconds: int = 6 * 3600,
+        max_bytes: int = 64 * 1024 * 1024,
+        memory_entries: int = 1000,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.memory_entries = max(0, memory_entries)
+        self._memory: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._last_compact = time.time()
+        self._conn = None
+        if path is not None:
+            self._conn = connect(path)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS page_cache (
+                    key TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    images TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    used_at REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS page_cache_used_at ON page_cache (used_at)")
+
+    @staticmethod
+    def key(url: str, profile: ExtractionProfile = DEFAULT_PROFILE) -> str:
+        suffix = profile_key(profile)
+        return f"{canonical_url(url)} {suffix}" if suffix else canonical_url(url)
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return time.time() - page.fetched_at < self.ttl_seconds
+
+    def _remember(self, key: str, page: CachedPage) -> None:
+        if not self.memory_entries:
+            return
+        self._memory[key] = page
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[CachedPage]:
+        """The cached page, fresh or not (stale ones can still be revalidated)."""
+        page = self._memory.get(key)
+        if page is not None:
+            self._memory.move_to_end(key)
+            return page
+        if self._conn is None:
+            return None
+        row = self._conn.execute(
+            "SELECT text, images, etag, last_modified, fetched_at FROM page_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        text, images, etag, last_modified, fetched_at = row
+        page = CachedPage(text, json.loads(images), etag, last_modified, fetched_at)
+        self._conn.execute("UPDATE page_cache SET used_at = ? WHERE key = ?", (time.time(), key))
+        self._remember(key, page)
+        return page
+
+    def put(self, key: str, page: CachedPage) -> None:
+        self._remember(key, page)
+        if self._conn is None:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO page_cache (key, text, images, etag, last_modified, fetched_at, used_at, size)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                page.text,
+                json.dumps(page.images, ensure_ascii=False),
+                page.etag,
+                page.last_modified,
+                page.fetched_at,
+                time.time(),
+                page.size,
+            ),
+        )
+
+    def revalidated(self, key: str, page: CachedPage) -> None:
+        """The server answered 304: the page is fresh again."""
+        page.fetched_at = time.time()
+        self._remember(key, page)
+        if self._conn is not None:
+            self._conn.execute(
+                "UPDATE page_cache SET fetched_at = ?, used_at = ? WHERE key = ?",
+                (page.fetched_at, page.fetched_at, key),
+            )
+
+    def compact(self) -> None:
+        """Drop expired pages, then the least recently used ones above the size cap."""
+        now = time.time()
+        self._last_compact = now
+        expired = now - self.ttl_seconds * REVALIDATE_TTLS
+        for key in [key for key, page in self._memory.items() if page.fetched_at < expired]:
+            del self._memory[key]
+        if self._conn is None:
+            return
+        self._conn.execute(
+            "DELETE FROM page_cache"
+            " WHERE fetched_at < ? OR (fetched_at < ? AND etag IS NULL AND last_modified IS NULL)",
+            (expired, now - self.ttl_seconds),
+        )
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM page_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        dropped = 0
+        victims: List[str] = []
+        for key, size in self._conn.execute("SELECT key, size FROM page_cache ORDER BY used_at"):
+            if dropped >= excess:
+                break
+            victims.append(key)
+            dropped += size
+        self._conn.executemany("DELETE FROM page_cache WHERE key = ?", [(key,) for key in victims])
+        for key in victims:
+            self._memory.pop(key, None)
+        logger.info("Page cache over %d bytes, evicted %d pages", self.max_bytes, len(victims))
+
+    def maybe_compact(self) -> None:
+        if time.time() - self._last_compact >= COMPACT_EVERY_SECONDS:
+            self.compact()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import BrokenExecutor, Executor, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ParsePool:
+    """
+    Executor for CPU-heavy parsing (feedparser, article HTML extraction) off the event loop.
+
+    `kind="process"` spreads parsing across cores; if a process pool cannot be
+    started or breaks, the pool falls back to threads, which still keep the
+    loop responsive while a large feed parses. Callables and their arguments
+    must be picklable (module-level functions, bytes/str in, plain data out).
+    """
+
+    def __init__(self, workers: int, kind: str = "process") -> None:
+        self.workers = max(1, workers)
+        self.kind = kind
+        self._executor = self._create(kind)
+
+    def _create(self, kind: str) -> Executor:
+        if kind == "process":
+            # imported here: it pulls in multiprocessing, which thread pools never need
+            from concurrent.futures import ProcessPoolExecutor
+
+            try:
+                return ProcessPoolExecutor(max_workers=self.workers)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Process pool unavailable (%s), parsing in threads", exc)
+        self.kind = "thread"
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parse")
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args)
+        try:
+            return await loop.run_in_executor(self._executor, call)
+        except BrokenExecutor:
+            if self.kind != "process":
+                raise
+            logger.warning("Process pool broke, switching parsing to threads")
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._create("thread")
+            return await loop.run_in_executor(self._executor, call)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
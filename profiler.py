@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+from metrics import add_stage_listener, remove_stage_listener
+
+if TYPE_CHECKING:
+    import cProfile
+
+logger = logging.getLogger(__name__)
+
+NO_SOURCE = "(no source)"
+OTHER_STAGE = "(other)"
+MAX_STACK_DEPTH = 128
+
+# Stage of a frame, by function name first and then by module; the innermost
+# frame that maps to a stage wins, frames of shared helpers (HTTP, extraction,
+# serialization) take the stage of their caller.
+STAGE_FUNCTIONS = {
+    "_download_feed": "download",
+    "fetch_source": "download",
+    "parse_feed_bytes": "parse",
+    "deliver_items": "deliver",
+    "_send_chunk": "deliver",
+    "deliver_source": "deliver",
+}
+STAGE_MODULES = {
+    "rss_parser.py": "download",
+    "gnews_adapter.py": "download",
+    "feed_cache.py": "download",
+    "feed_stream.py": "parse",
+    "parse_pool.py": "parse",
+    "normalizer.py": "normalize",
+    "enrichment.py": "enrich",
+    "page_cache.py": "enrich",
+    "backend_client.py": "deliver",
+    "spool.py": "deliver",
+}
+STAGE_PACKAGES = {"feedparser": "parse"}
+# Frames that know which source they work for, and the local that tells.
+SOURCE_LOCALS = {
+    "_run_source_guarded": "source",
+    "fetch_source": "source",
+    "fetch_and_parse": "source",
+    "stream_feed": "source",
+    "fetch_and_parse_gnews": "source",
+    "parse_feed_bytes": "source_name",
+    "enrich_item": "item",
+    "deliver_source": "source",
+    "deliver_items": "source",
+    "_send_chunk": "source",
+}
+
+
+def _module_stage(filename: str) -> Optional[str]:
+    path = Path(filename)
+    stage = STAGE_MODULES.get(path.name)
+    if stage is None:
+        for package in path.parts[-3:-1]:
+            stage = STAGE_PACKAGES.get(package)
+            if stage is not None:
+                break
+    return stage
+
+
+def _source_of(frame) -> Optional[str]:
+    name = SOURCE_LOCALS.get(frame.f_code.co_name)
+    if name is None or name not in frame.f_code.co_varnames:
+        return None
+    value = frame.f_locals.get(name)
+    if isinstance(value, str):
+        return value
+    return getattr(value, "name", None) or getattr(value, "source_name", None)
+
+
+def fold_stack(frame) -> Tuple[str, str, str]:
+    """(source, stage, "outer;...;inner") for a running frame."""
+    labels: List[str] = []
+    source: Optional[str] = None
+    stage: Optional[str] = None
+    depth = 0
+    while frame is not None and depth < MAX_STACK_DEPTH:
+        code = frame.f_code
+        if stage is None:
+            stage = STAGE_FUNCTIONS.get(code.co_name) or _module_stage(code.co_filename)
+        if source is None:
+            source = _source_of(frame)
+        labels.append(f"{Path(code.co_filename).stem}:{getattr(code, 'co_qualname', code.co_name)}")
+        frame = frame.f_back
+        depth += 1
+    labels.reverse()
+    return source or NO_SOURCE, stage or OTHER_STAGE, ";".join(labels)
+
+
+class StackSampler:
+    """Samples one thread's stack every `interval` seconds from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                try:
+                    self.samples[fold_stack(frame)] += 1
+                except Exception:  # noqa: BLE001 - the frame may unwind while we walk it
+                    continue
+            del frame
+
+
+class CycleProfiler:
+    """
+    Opt-in profile of one scheduler cycle: armed with `request()` (PROFILE=1
+    at start-up or SIGUSR1), it starts on the next scheduler tick and ends
+    once every scheduled source has run, or after `max_seconds`.
+
+    A cycle leaves, under `output_dir`:
+    - `<name>.folded`: event-loop stack samples as `source;stage;frames count`
+      lines, ready for flamegraph.pl / speedscope;
+    - `<name>.pstats`: a cProfile of the event-loop thread (`enable_cprofile`);
+    - `<name>.txt`: stage wall time per source, samples per source and stage,
+      and the `top` tracemalloc lines, overall and per stage, for memory
+      allocated during the cycle and still held at its end.
+
+    Parsing in a process pool runs outside the sampled thread and only shows
+    up in the stage wall times.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        sample_interval: float = 0.005,
+        top: int = 25,
+        max_seconds: float = 600.0,
+        enable_cprofile: bool = True,
+        trace_frames: int = 16,
+    ) -> None:
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.top = top
+        self.max_seconds = max_seconds
+        self.enable_cprofile = enable_cprofile
+        self.trace_frames = trace_frames
+        self.requested = False
+        self._pending: Set[str] = set()
+        self._started: Optional[float] = None
+        self._sampler: Optional[StackSampler] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._stages: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self._own_tracemalloc = False
+
+    @property
+    def active(self) -> bool:
+        return self._started is not None
+
+    def request(self) -> None:
+        if self.active:
+            logger.info("Profiling already in progress")
+            return
+        self.requested = True
+        logger.info("Profiling requested for the next cycle")
+
+    def maybe_start(self, sources: Iterable[str]) -> None:
+        """Start a requested profile; `sources` are the ones the cycle waits for."""
+        if not self.requested or self.active:
+            return
+        # imported here: the profiler is always constructed but rarely used
+        import cProfile
+        import tracemalloc
+
+        self.requested = False
+        self._pending = set(sources)
+        self._stages.clear()
+        self._started = time.monotonic()
+        self._own_tracemalloc = not tracemalloc.is_tracing()
+        if self._own_tracemalloc:
+            tracemalloc.start(self.trace_frames)
+        add_stage_listener(self._on_stage)
+        self._sampler = StackSampler(threading.get_ident(), self.sample_interval)
+        self._sampler.start()
+        if self.enable_cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        logger.info("Profiling cycle of %d sources", len(self._pending))
+
+    def _on_stage(self, source: str, stage: str, seconds: float) -> None:
+        self._stages[source][stage] += seconds
+
+    def source_done(self, name: str) -> None:
+        if not self.active:
+            return
+        self._pending.discard(name)
+        if not self._pending:
+            self.finish()
+
+    def maybe_finish(self) -> None:
+        if not self.active:
+            return
+        if self._pending and time.monotonic() - self._started >= self.max_seconds:
+            logger.info("Profiling hit %ss with %d sources still pending", self.max_seconds, len(self._pending))
+            self.finish()
+        elif not self._pending:
+            self.finish()
+
+    def finish(self) -> Optional[Path]:
+        """Stop profiling and write the reports; returns the path prefix of the files written."""
+        if not self.active:
+            return None
+        import tracemalloc
+
+        elapsed = time.monotonic() - self._started
+        self._started = None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self._sampler.stop()
+        remove_stage_listener(self._on_stage)
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+        prefix = self.output_dir / f"cycle-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            self._write_folded(prefix.with_suffix(".folded"))
+            if self._cprofile is not None:
+                self._cprofile.dump_stats(str(prefix.with_suffix(".pstats")))
+            self._write_summary(prefix.with_suffix(".txt"), elapsed, snapshot, peak)
+        except OSError as exc:
+            logger.warning("Failed to write profile to %s: %s", self.output_dir, exc)
+            return None
+        finally:
+            self._cprofile = None
+            self._sampler = None
+        logger.info("Profile of %.1fs cycle written to %s.*", elapsed, prefix)
+        return prefix
+
+    def _write_folded(self, path: Path) -> None:
+        with path.open("w", encoding="utf-8") as fh:
+            for (source, stage, stack), count in sorted(self._sampler.samples.items()):
+                fh.write(f"{source};{stage};{stack} {count}\n")
+
+    def _write_summary(self, path: Path, elapsed: float, snapshot, peak: int) -> None:
+        import tracemalloc
+
+        lines = [f"cycle: {elapsed:.2f}s, {sum(self._sampler.samples.values())} samples", "", "stage wall time, s:"]
+        for source in sorted(self._stages):
+            stages = ", ".join(f"{stage}={seconds:.3f}" for stage, seconds in sorted(self._stages[source].items()))
+            lines.append(f"  {source}: {stages}")
+
+        by_source: Counter = Counter()
+        by_stage: Counter = Counter()
+        for (source, stage, _), count in self._sampler.samples.items():
+            by_source[source] += count
+            by_stage[(source, stage)] += count
+        lines += ["", "event-loop samples by source and stage:"]
+        for source, total in by_source.most_common():
+            stages = ", ".join(
+                f"{stage}={count}" for (name, stage), count in by_stage.most_common() if name == source
+            )
+            lines.append(f"  {source}: {total} ({stages})")
+
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces(
+                (
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, __file__),
+                )
+            )
+            stats = snapshot.statistics("lineno")
+            lines += ["", f"allocations still held, top {self.top} lines (peak traced {peak / 1e6:.1f} MB):"]
+            lines += [f"  {stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {stat.traceback[0]}" for stat in stats[: self.top]]
+            lines += ["", "allocations still held by stage:"]
+            for stage, (size, lines_top) in self._allocations_by_stage(snapshot):
+                lines.append(f"  {stage}: {size / 1024:.1f} KiB")
+                lines += [f"    {line_size / 1024:10.1f} KiB  {frame}" for frame, line_size in lines_top]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def _allocations_by_stage(self, snapshot) -> List[Tuple[str, Tuple[int, List[Tuple[str, int]]]]]:
+        totals: Counter = Counter()
+        per_line: Dict[str, Counter] = defaultdict(Counter)
+        for trace in snapshot.traces:
+            frames = trace.traceback
+            stage = OTHER_STAGE
+            # frames run oldest first; walk out from the allocating one
+            for frame in reversed(frames):
+                stage = _module_stage(frame.filename) or OTHER_STAGE
+                if stage != OTHER_STAGE:
+                    break
+            totals[stage] += trace.size
+            per_line[stage][str(frames[-1])] += trace.size
+        return [
+            (stage, (size, per_line[stage].most_common(max(1, self.top // 5))))
+            for stage, size in totals.most_common()
+        ]
+
+    def close(self) -> None:
+        """Write whatever was recorded if the parser stops mid-cycle."""
+        self.finish()
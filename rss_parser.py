@@ -2,13 +2,17 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import List
-
-import feedparser
-import httpx
+import time
+from typing import AsyncIterator, Callable, Dict, List, Tuple
 
 from core.models import SourceConfig, NewsItem
-from core.normalizer import normalize_entry, normalize_text
+from core.normalizer import normalize_entries, normalize_entry
+from feed_cache import FeedCache, FeedValidators, body_hash
+from feed_stream import FeedStreamError, FeedStreamParser
+from host_guard import CircuitOpenError
+from http_transport import get_transport
+from metrics import BYTES_DOWNLOADED, RETRIES, observe_stage, stage_timer
+from parse_pool import ParsePool
 
 logger = logging.getLogger(__name__)
 
@@ -16,121 +20,212 @@ MAX_RSS_SIZE_BYTES = 5 * 1024 * 1024  # 5 MB
 BACKOFF_BASE = 2
 
 
-async def fetch_and_parse(source: SourceConfig, request_timeout: int, max_retries: int) -> List[NewsItem]:
-    raw_data = await _download_feed(source, request_timeout, max_retries)
+async def fetch_and_parse(
+    source: SourceConfig,
+    request_timeout: int,
+    max_retries: int,
+    feed_cache: FeedCache | None = None,
+    parse_pool: ParsePool | None = None,
+    stream: bool = False,
+    stop_at: Callable[[NewsItem], bool] | None = None,
+) -> List[NewsItem]:
+    """
+    Download and normalize a feed. Items are returned as the feed has them;
+    full-text enrichment happens later, per item, right before delivery.
+    With a parse pool, feedparser and normalization run off the event loop.
+
+    With `stream=True` entries are parsed while the body downloads and reading
+    stops at the first item `stop_at` marks (already delivered / below the
+    watermark); feeds that can't be parsed incrementally fall back to feedparser.
+    """
+    if stream:
+        try:
+            with stage_timer(source.name, "stream"):
+                return [item async for item in stream_feed(source, request_timeout, max_retries, feed_cache, stop_at)]
+        except FeedStreamError as exc:
+            logger.info("Streaming parse failed for %s (%s), falling back to full download", source.name, exc)
+
+    with stage_timer(source.name, "download"):
+        raw_data = await _download_feed(source, request_timeout, max_retries, feed_cache)
+    if raw_data is None:
+        logger.info("Feed %s not modified, skipping parse", source.name)
+        return []
+    if parse_pool is not None:
+        items, warning, timings = await parse_pool.run(parse_feed_bytes, raw_data, source.name)
+    else:
+        items, warning, timings = parse_feed_bytes(raw_data, source.name)
+    for stage, seconds in timings.items():
+        observe_stage(source.name, stage, seconds)
+    if warning:
+        logger.warning("Feed parse warning for %s: %s", source.name, warning)
+    return items
+
+
+def parse_feed_bytes(raw_data: bytes, source_name: str) -> Tuple[List[NewsItem], str | None, Dict[str, float]]:
+    """
+    Parse raw feed bytes into normalized items (CPU-bound, pool-safe).
+    Stage timings are returned rather than recorded: in a process pool the
+    worker's metrics would never reach the parent.
+    """
+    import feedparser  # deferred: streamed feeds and GNews-only runs never need it
+
+    started = time.perf_counter()
     feed = feedparser.parse(raw_data)
-    if feed.bozo:
-        logger.warning("Feed parse warning for %s: %s", source.name, feed.bozo_exception)
+    parsed = time.perf_counter()
+    warning = str(feed.bozo_exception) if feed.bozo else None
     entries = feed.entries or []
-    items = [normalize_entry(entry, source.name) for entry in entries]
-    # fallback: fetch full article text / images if missing
-    for item in items:
-        need_text = not item.text.strip()
-        need_images = not item.image_urls
-        if item.url and (need_text or need_images):
-            full_text, images = await _fetch_full_text_and_images(item.url, request_timeout)
-            if full_text and need_text:
-                item.text = normalize_text(full_text)
-            if images and need_images:
-                item.image_urls = images
-    return items
+    items = normalize_entries(entries, source_name)
+    timings = {"parse": parsed - started, "normalize": time.perf_counter() - parsed}
+    return items, warning, timings
+
+
+async def stream_feed(
+    source: SourceConfig,
+    request_timeout: int,
+    max_retries: int,
+    feed_cache: FeedCache | None = None,
+    stop_at: Callable[[NewsItem], bool] | None = None,
+) -> AsyncIterator[NewsItem]:
+    """
+    Yield items in feed order while the body is still downloading.
 
+    Stops reading the socket at the first item `stop_at` marks. Retries only
+    until the first item was yielded; raises FeedStreamError on malformed XML.
+    """
+    if not source.rss_url:
+        raise ValueError(f"Source {source.name} missing rss_url")
+    previous = None
+    if feed_cache is not None:
+        feed_cache.discard(source)
+        previous = feed_cache.get(source)
+    headers = previous.request_headers() if previous is not None else {}
+    attempt = 0
+    transport = get_transport()
+    while True:
+        attempt += 1
+        yielded = 0
+        try:
+            async with transport.stream(
+                "GET", source.rss_url, follow_redirects=True, timeout=request_timeout, headers=headers
+            ) as resp:
+                if resp.status_code == 304 and previous is not None:
+                    logger.info("Feed %s not modified, skipping parse", source.name)
+                    return
+                resp.raise_for_status()
+                if feed_cache is not None:
+                    # No body hash: the tail of the feed is usually never read.
+                    feed_cache.stage(
+                        source,
+                        FeedValidators(etag=resp.headers.get("etag"), last_modified=resp.headers.get("last-modified")),
+                    )
+                parser = FeedStreamParser()
+                size = 0
+                chunks = resp.aiter_bytes()
+                while True:
+                    chunk = await anext(chunks, None)
+                    if chunk is not None:
+                        size += len(chunk)
+                        BYTES_DOWNLOADED.inc(len(chunk), source=source.name)
+                        if size > MAX_RSS_SIZE_BYTES:
+                            raise ValueError("Feed exceeds size limit while streaming")
+                    entries = parser.feed(chunk) if chunk is not None else parser.close()
+                    for entry in entries:
+                        item = normalize_entry(entry, source.name)
+                        if stop_at is not None and stop_at(item):
+                            logger.info(
+                                "Reached known item in %s after %d new, %d bytes read; stopping download",
+                                source.name,
+                                yielded,
+                                size,
+                            )
+                            return
+                        yielded += 1
+                        yield item
+                    if chunk is None:
+                        return
+        except (FeedStreamError, CircuitOpenError):
+            raise
+        except Exception as exc:  # noqa: BLE001
+            if yielded or attempt >= max_retries:
+                logger.warning("Source %s stream failed after %d attempts: %s", source.name, attempt, exc)
+                raise
+            RETRIES.inc(source=source.name, kind="rss")
+            delay = BACKOFF_BASE ** (attempt - 1)
+            logger.warning(
+                "RSS fetch failed for %s (attempt %d/%d): %s. Sleeping %ss",
+                source.name,
+                attempt,
+                max_retries,
+                exc,
+                delay,
+            )
+            await asyncio.sleep(delay)
+
+
+async def _download_feed(
+    source: SourceConfig,
+    request_timeout: int,
+    max_retries: int,
+    feed_cache: FeedCache | None = None,
+) -> bytes | None:
+    """
+    Download the feed body.
 
-async def _download_feed(source: SourceConfig, request_timeout: int, max_retries: int) -> bytes:
+    With a feed cache, sends If-None-Match / If-Modified-Since and returns None
+    when the feed is unchanged (HTTP 304 or the same body hash as last time).
+    """
     if not source.rss_url:
         raise ValueError(f"Source {source.name} missing rss_url")
+    previous = None
+    if feed_cache is not None:
+        feed_cache.discard(source)
+        previous = feed_cache.get(source)
+    headers = previous.request_headers() if previous is not None else {}
     attempt = 0
     last_err: Exception | None = None
-    async with httpx.AsyncClient(timeout=request_timeout) as client:
-        while attempt < max_retries:
-            attempt += 1
-            try:
-                resp = await client.get(source.rss_url, follow_redirects=True)
+    transport = get_transport()
+    while attempt < max_retries:
+        attempt += 1
+        try:
+            async with transport.stream(
+                "GET", source.rss_url, follow_redirects=True, timeout=request_timeout, headers=headers
+            ) as resp:
+                if resp.status_code == 304 and previous is not None:
+                    return None
                 resp.raise_for_status()
                 data = bytearray()
                 async for chunk in resp.aiter_bytes():
                     data.extend(chunk)
+                    BYTES_DOWNLOADED.inc(len(chunk), source=source.name)
                     if len(data) > MAX_RSS_SIZE_BYTES:
                         raise ValueError("Feed exceeds size limit while streaming")
-                return bytes(data)
-            except Exception as exc:  # noqa: BLE001
-                last_err = exc
-                delay = (BACKOFF_BASE ** (attempt - 1))
-                logger.warning(
-                    "RSS fetch failed for %s (attempt %d/%d): %s. Sleeping %ss",
-                    source.name,
-                    attempt,
-                    max_retries,
-                    exc,
-                    delay,
+                validators = FeedValidators(
+                    etag=resp.headers.get("etag"),
+                    last_modified=resp.headers.get("last-modified"),
                 )
-                await asyncio.sleep(delay)
+            raw = bytes(data)
+            if feed_cache is not None:
+                validators.body_hash = body_hash(raw)
+                feed_cache.stage(source, validators)
+                if previous is not None and previous.body_hash == validators.body_hash:
+                    return None
+            return raw
+        except CircuitOpenError:
+            raise  # the host is down or throttling us; retrying now only makes it worse
+        except Exception as exc:  # noqa: BLE001
+            last_err = exc
+            if attempt < max_retries:
+                RETRIES.inc(source=source.name, kind="rss")
+            delay = (BACKOFF_BASE ** (attempt - 1))
+            logger.warning(
+                "RSS fetch failed for %s (attempt %d/%d): %s. Sleeping %ss",
+                source.name,
+                attempt,
+                max_retries,
+                exc,
+                delay,
+            )
+            await asyncio.sleep(delay)
     assert last_err is not None
     logger.warning("Source %s failed after %d attempts, skipping", source.name, max_retries)
     raise last_err
-
-
-async def _fetch_full_text_and_images(url: str, timeout: int) -> tuple[str, List[str]]:
-    """
-    Best-effort fetch of article body/images when RSS entry has no data.
-    """
-    try:
-        import bs4  # type: ignore
-    except Exception:
-        return "", []
-
-    try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            resp = await client.get(url, follow_redirects=True)
-            resp.raise_for_status()
-            html = resp.text
-    except Exception as exc:  # noqa: BLE001
-        logger.debug("Failed to fetch full text %s: %s", url, exc)
-        return "", []
-
-    try:
-        soup = bs4.BeautifulSoup(html, "html.parser")
-        images: List[str] = []
-
-        # meta images
-        for prop in ("og:image", "twitter:image"):
-            tag = soup.find("meta", property=prop) or soup.find("meta", attrs={"name": prop})
-            if tag and tag.get("content"):
-                images.append(tag["content"])
-
-        # article/main images
-        for sel in ["article img", "main img"]:
-            for img in soup.select(sel):
-                src = img.get("src")
-                if src:
-                    images.append(src)
-
-        # deduplicate images
-        seen = set()
-        unique_images = []
-        for u in images:
-            u = u.strip()
-            if u and u not in seen:
-                seen.add(u)
-                unique_images.append(u)
-        # common containers
-        selectors = [
-            "article",
-            "div.article__body",
-            "div.article-body",
-            "div#article",
-            "div.content",
-        ]
-        for sel in selectors:
-            node = soup.select_one(sel)
-            if node:
-                text = node.get_text(" ", strip=True)
-                if text:
-                    return text, unique_images
-        # fallback to all paragraphs
-        paragraphs = soup.find_all("p")
-        text = " ".join(p.get_text(" ", strip=True) for p in paragraphs)
-        return text, unique_images
-    except Exception as exc:  # noqa: BLE001
-        logger.debug("Failed to parse full text %s: %s", url, exc)
-        return "", []
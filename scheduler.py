@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.models import SourceConfig
+
+logger = logging.getLogger(__name__)
+
+RATE_SMOOTHING = 0.3  # weight of the newest observation in the new-item rate EWMA
+MAX_BACKOFF_DOUBLINGS = 16  # past this the interval is long clamped; larger powers overflow a float
+
+
+@dataclass
+class _SourceState:
+    source: SourceConfig
+    base_interval: float
+    interval: float
+    next_due: float
+    last_run: Optional[float] = None
+    rate: float = 0.0  # smoothed new items per second
+    failures: int = 0
+    running: bool = False
+
+
+class SourceScheduler:
+    """
+    Priority-queue scheduler with one next-due time per source.
+
+    After every run the source's interval adapts: it aims at about
+    `target_new_items` new items per poll from the smoothed new-item rate,
+    backs off exponentially on failures, and always stays within
+    [min_interval, max_interval].
+    """
+
+    def __init__(
+        self,
+        default_interval: float,
+        min_interval: float,
+        max_interval: float,
+        target_new_items: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.default_interval = default_interval
+        self.min_interval = max(1.0, min_interval)
+        self.max_interval = max(self.min_interval, max_interval)
+        self.target_new_items = max(0.1, target_new_items)
+        self.clock = clock
+        self._states: Dict[str, _SourceState] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = 0
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def _push(self, state: _SourceState) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (state.next_due, self._seq, state.source.name))
+
+    def sync(self, sources: List[SourceConfig]) -> None:
+        """Apply a (re)loaded config: add new sources as due now, drop removed ones, pick up edits."""
+        now = self.clock()
+        names = {source.name for source in sources}
+        for name in list(self._states):
+            if name not in names:
+                logger.info("Source %s removed from config, unscheduling", name)
+                del self._states[name]
+        for source in sources:
+            base = float(source.poll_interval_seconds or self.default_interval)
+            state = self._states.get(source.name)
+            if state is None:
+                state = _SourceState(source=source, base_interval=base, interval=self._clamp(base), next_due=now)
+                self._states[source.name] = state
+                self._push(state)
+                continue
+            state.source = source
+            if base != state.base_interval:
+                logger.info("Poll interval for %s changed to %ss, rescheduling", source.name, base)
+                state.base_interval = base
+                state.interval = self._clamp(base)
+                if not state.running:
+                    state.next_due = min(state.next_due, now + state.interval)
+                    self._push(state)
+
+    def pop_due(self) -> List[SourceConfig]:
+        """Sources whose time has come; they stay off the queue until `record` is called."""
+        now = self.clock()
+        due: List[SourceConfig] = []
+        while self._heap and self._heap[0][0] <= now:
+            next_due, _, name = heapq.heappop(self._heap)
+            state = self._states.get(name)
+            if state is None or state.running or state.next_due != next_due:
+                continue  # stale heap entry
+            state.running = True
+            due.append(state.source)
+        return due
+
+    def seconds_until_next(self) -> Optional[float]:
+        while self._heap:
+            next_due, _, name = self._heap[0]
+            state = self._states.get(name)
+            if state is None or state.running or state.next_due != next_due:
+                heapq.heappop(self._heap)
+                continue
+            return max(0.0, next_due - self.clock())
+        return None
+
+    def record(self, name: str, created: Optional[int]) -> None:
+        """Reschedule after a run; `created=None` means the run failed."""
+        state = self._states.get(name)
+        if state is None:
+            return
+        now = self.clock()
+        previous_run, state.last_run = state.last_run, now
+        state.running = False
+
+        if created is None:
+            state.failures += 1
+            state.interval = self._clamp(state.base_interval * (2 ** min(state.failures, MAX_BACKOFF_DOUBLINGS)))
+        else:
+            state.failures = 0
+            # The first run only drains the feed's backlog and says nothing about the rate.
+            if previous_run is not None:
+                observed = created / max(now - previous_run, 1.0)
+                state.rate = RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * state.rate
+            if state.rate > 0:
+                state.interval = self._clamp(self.target_new_items / state.rate)
+            else:
+                state.interval = self._clamp(state.base_interval)
+        state.next_due = now + state.interval
+        self._push(state)
+        logger.debug(
+            "Source %s next poll in %.0fs (created=%s, failures=%d)", name, state.interval, created, state.failures
+        )
+
+    def postpone(self, name: str) -> None:
+        """The source did not run (another worker holds it): try again after its interval, rate untouched."""
+        state = self._states.get(name)
+        if state is None:
+            return
+        state.running = False
+        state.next_due = self.clock() + state.interval
+        self._push(state)
+
+    def names(self) -> List[str]:
+        return list(self._states)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        now = self.clock()
+        return {
+            name: {
+                "interval": state.interval,
+                "due_in": max(0.0, state.next_due - now),
+                "rate_per_hour": state.rate * 3600,
+                "failures": state.failures,
+            }
+            for name, state in self._states.items()
+        }
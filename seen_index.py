@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import time
+from pathlib import Path
+from typing import Iterable, List
+
+from core.models import NewsItem
+from storage import connect
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+COMPACT_EVERY_SECONDS = 3600
+SYNC_SLACK_SECONDS = 5.0  # rows are stamped just before they commit
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on one blake2b digest)."""
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.01) -> None:
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def item_fingerprint(item: NewsItem) -> str:
+    """Content fingerprint that survives URL changes (tracking params, mirrors)."""
+    basis = f"{item.source_name}\n{item.header.strip().lower()}\n{item.date.isoformat()}"
+    return hashlib.sha1(basis.encode("utf-8")).hexdigest()
+
+
+def item_keys(item: NewsItem) -> List[str]:
+    keys = [f"fp:{item_fingerprint(item)}"]
+    if item.url:
+        keys.append(f"url:{item.url}")
+    return keys
+
+
+class SeenIndex:
+    """
+    On-disk index of items the backend already answered for (created or duplicate).
+
+    Lookups go through an in-memory Bloom filter first, so the common
+    "never seen" answer costs no SQLite query. Rows older than `ttl_seconds`
+    are dropped on compaction and the filter is rebuilt.
+    """
+
+    def __init__(self, path: Path, ttl_seconds: int = DEFAULT_TTL_SECONDS, capacity: int = 200_000) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.capacity = capacity
+        self._conn = connect(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seen_items (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                seen_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS seen_items_seen_at ON seen_items (seen_at)")
+        self._bloom = BloomFilter(capacity)
+        self._last_compact = 0.0
+        self._synced_at = 0.0
+        self.compact()
+
+    def contains(self, item: NewsItem) -> bool:
+        candidates = [key for key in item_keys(item) if key in self._bloom]
+        if not candidates:
+            return False
+        placeholders = ",".join("?" for _ in candidates)
+        row = self._conn.execute(
+            f"SELECT 1 FROM seen_items WHERE key IN ({placeholders}) LIMIT 1", candidates
+        ).fetchone()
+        return row is not None
+
+    def mark(self, item: NewsItem) -> None:
+        self.mark_keys(item_keys(item), item.source_name)
+
+    def mark_keys(self, keys: List[str], source: str) -> None:
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO seen_items (key, source, seen_at) VALUES (?, ?, ?)",
+            [(key, source, now) for key in keys],
+        )
+        for key in keys:
+            self._bloom.add(key)
+
+    def compact(self) -> None:
+        """Drop expired rows and rebuild the Bloom filter from what is left."""
+        started = time.time()
+        cutoff = started - self.ttl_seconds
+        deleted = self._conn.execute("DELETE FROM seen_items WHERE seen_at < ?", (cutoff,)).rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM seen_items").fetchone()[0]
+        bloom = BloomFilter(max(self.capacity, count * 2))
+        for (key,) in self._conn.execute("SELECT key FROM seen_items"):
+            bloom.add(key)
+        self._bloom = bloom
+        self._synced_at = started
+        self._last_compact = time.time()
+        logger.debug("Seen index compacted: %d expired, %d kept", deleted, count)
+
+    def refresh(self) -> None:
+        """Add the keys other processes marked since the last refresh to the Bloom filter."""
+        started = time.time()
+        since = self._synced_at - SYNC_SLACK_SECONDS
+        for (key,) in self._conn.execute("SELECT key FROM seen_items WHERE seen_at >= ?", (since,)):
+            self._bloom.add(key)
+        self._synced_at = started
+
+    def maybe_compact(self) -> None:
+        if time.time() - self._last_compact >= COMPACT_EVERY_SECONDS:
+            self.compact()
+
+    def close(self) -> None:
+        self._conn.close()
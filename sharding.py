@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Callable, List, Sequence, Tuple
+
+from core.models import SourceConfig
+from storage import connect
+
+logger = logging.getLogger(__name__)
+
+VIRTUAL_NODES = 64
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class HashRing:
+    """
+    Consistent hash ring: each node owns the arcs before its `vnodes` points,
+    so adding or removing a node only moves the sources on its arcs.
+    """
+
+    def __init__(self, nodes: Sequence[str], vnodes: int = VIRTUAL_NODES) -> None:
+        self.nodes = sorted(set(nodes))
+        self._points: List[Tuple[int, str]] = sorted(
+            (_hash(f"{node}#{replica}"), node) for node in self.nodes for replica in range(vnodes)
+        )
+        self._keys = [point for point, _ in self._points]
+
+    def owner(self, key: str) -> str:
+        if not self._points:
+            raise ValueError("hash ring has no nodes")
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._points)
+        return self._points[index][1]
+
+
+class ShardCoordinator:
+    """
+    Splits the sources between parser processes sharing one SQLite store.
+
+    Every worker heartbeats into `shard_workers`; the live ones (heartbeat
+    younger than `lease_seconds`) form a hash ring that decides which
+    sources each worker schedules. Running a source additionally needs its
+    lease in `shard_leases`, taken atomically and renewed by the heartbeat:
+    while membership changes, two workers may both think they own a
+    source, but only one of them runs it. A crashed worker stops renewing;
+    its heartbeat and leases expire and the ring hands its sources over.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        worker_id: str | None = None,
+        lease_seconds: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = max(1.0, lease_seconds / 3)
+        self.clock = clock
+        self._members: List[str] = []
+        self._ring = HashRing([self.worker_id])
+        self._conn = connect(path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shard_workers (
+                worker_id TEXT PRIMARY KEY,
+                heartbeat_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shard_leases (
+                source TEXT PRIMARY KEY,
+                worker_id TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+
+    def heartbeat(self) -> bool:
+        """Announce this worker and renew its leases; True when the set of live workers changed."""
+        now = self.clock()
+        self._conn.execute(
+            "INSERT INTO shard_workers (worker_id, heartbeat_at) VALUES (?, ?)"
+            " ON CONFLICT(worker_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+            (self.worker_id, now),
+        )
+        self._conn.execute(
+            "UPDATE shard_leases SET expires_at = ? WHERE worker_id = ?", (now + self.lease_seconds, self.worker_id)
+        )
+        self._conn.execute("DELETE FROM shard_workers WHERE heartbeat_at < ?", (now - self.lease_seconds,))
+        members = [row[0] for row in self._conn.execute("SELECT worker_id FROM shard_workers ORDER BY worker_id")]
+        if members == self._members:
+            return False
+        logger.info("Shard %s: %d live workers (%s)", self.worker_id, len(members), ", ".join(members))
+        self._members = members
+        self._ring = HashRing(members)
+        return True
+
+    @property
+    def members(self) -> List[str]:
+        return list(self._members)
+
+    def owns(self, source_name: str) -> bool:
+        return self._ring.owner(source_name) == self.worker_id
+
+    def assigned(self, sources: Sequence[SourceConfig]) -> List[SourceConfig]:
+        return [source for source in sources if self.owns(source.name)]
+
+    def acquire(self, source_name: str) -> bool:
+        """Take (or keep) the source's lease; False while another worker holds a live one."""
+        now = self.clock()
+        cursor = self._conn.execute(
+            "INSERT INTO shard_leases (source, worker_id, expires_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(source) DO UPDATE SET worker_id = excluded.worker_id, expires_at = excluded.expires_at"
+            " WHERE shard_leases.expires_at < ? OR shard_leases.worker_id = excluded.worker_id",
+            (source_name, self.worker_id, now + self.lease_seconds, now),
+        )
+        return cursor.rowcount == 1
+
+    def release(self, source_name: str) -> None:
+        self._conn.execute(
+            "DELETE FROM shard_leases WHERE source = ? AND worker_id = ?", (source_name, self.worker_id)
+        )
+
+    def close(self) -> None:
+        """Leave the ring right away so the other workers don't wait for the heartbeat to expire."""
+        try:
+            self._conn.execute("DELETE FROM shard_leases WHERE worker_id = ?", (self.worker_id,))
+            self._conn.execute("DELETE FROM shard_workers WHERE worker_id = ?", (self.worker_id,))
+        finally:
+            self._conn.close()
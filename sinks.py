@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+from core.serialization import Payload, encode, loads
+from metrics import SINK_ERRORS
+from storage import connect
+
+logger = logging.getLogger(__name__)
+
+JSONL_BUFFER_BYTES = 1024 * 1024
+
+
+class Sink(abc.ABC):
+    """
+    Where delivered news go. Every sink answers per item like the backend does:
+
+        True  -> stored
+        False -> already there (created=false): the source stops here
+        None  -> not stored: the item goes to the outbound spool for replay
+
+    `save_news_batch` may return fewer results than payloads when it stops
+    after the first False. Delivery and spool replay only use these methods.
+    """
+
+    name = "sink"
+
+    @property
+    def batch_supported(self) -> bool | None:
+        """False when every item has to be sent alone, None until known."""
+        return True
+
+    async def save_news(self, payload: Payload) -> bool | None:
+        results = await self.save_news_batch([payload])
+        return results[0] if results else None
+
+    @abc.abstractmethod
+    async def save_news_batch(self, payloads: List[Payload]) -> List[bool | None]:
+        ...
+
+    async def close(self) -> None:
+        return None
+
+
+def payload_key(data: Dict[str, Any]) -> str:
+    """Unique key of a decoded payload, on the same basis as `seen_index.item_fingerprint`."""
+    basis = f"{data['source']}\n{data['title'].strip().lower()}\n{data['published_at']}"
+    return hashlib.sha1(basis.encode("utf-8")).hexdigest()
+
+
+class JsonlSink(Sink):
+    """
+    Appends payloads to a JSON Lines file, one object per line, as encoded
+    for the backend. A batch is written with one write and handed to the OS
+    before it is acknowledged, so a crashed process loses nothing it reported
+    as stored; fsync happens on close. The file has no key: every item counts
+    as created, duplicates are left to the seen index or a deduplicating sink
+    in front of it.
+    """
+
+    name = "jsonl"
+
+    def __init__(self, path: Path, buffer_bytes: int = JSONL_BUFFER_BYTES) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # O_APPEND: sharded workers can share the file, each batch lands whole
+        self._file = path.open("ab", buffering=buffer_bytes)
+
+    async def save_news_batch(self, payloads: List[Payload]) -> List[bool | None]:
+        if not payloads:
+            return []
+        try:
+            self._file.write(b"".join(encode(payload) + b"\n" for payload in payloads))
+            self._file.flush()
+        except (OSError, ValueError) as exc:
+            logger.warning("Writing %d items to %s failed: %s", len(payloads), self.path, exc)
+            return [None] * len(payloads)
+        return [True] * len(payloads)
+
+    async def close(self) -> None:
+        if self._file.closed:
+            return
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+
+
+class SQLiteSink(Sink):
+    """
+    Stores payloads in a SQLite table keyed by `payload_key`. A batch is one
+    transaction; a key that is already there answers False, like the backend's
+    created=false. Results cover the whole batch, as the batch endpoint does.
+    The transaction runs in a worker thread, one batch at a time, so waiting
+    on the write lock of a shared file does not stall the event loop.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._conn = connect(path)
+        self._lock = threading.Lock()
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS news (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                title TEXT NOT NULL,
+                published_at TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                stored_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS news_source_published ON news (source, published_at)")
+
+    @staticmethod
+    def _row(payload: Payload, now: float) -> Tuple[str, str, str, str, str, float]:
+        raw = encode(payload)
+        data = payload if isinstance(payload, dict) else loads(raw)
+        return payload_key(data), data["source"], data["title"], data["published_at"], raw.decode("utf-8"), now
+
+    async def save_news_batch(self, payloads: List[Payload]) -> List[bool | None]:
+        if not payloads:
+            return []
+        try:
+            now = time.time()
+            rows = [self._row(payload, now) for payload in payloads]
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Cannot store payloads in %s: %s", self.path, exc)
+            return [None] * len(payloads)
+        try:
+            return await asyncio.to_thread(self._insert, rows)
+        except sqlite3.Error as exc:
+            logger.warning("Writing %d items to %s failed: %s", len(payloads), self.path, exc)
+            return [None] * len(payloads)
+
+    def _insert(self, rows: List[Tuple[str, str, str, str, str, float]]) -> List[bool | None]:
+        results: List[bool | None] = []
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                for row in rows:
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO news (key, source, title, published_at, payload, stored_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        row,
+                    )
+                    results.append(cursor.rowcount == 1)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+        return results
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class FanoutSink(Sink):
+    """
+    Delivers to several sinks at once. The first one answers: its results
+    drive the created=false stop and the spool. Whatever it stored is then
+    copied to the others concurrently; a copy that fails is logged and counted
+    in parser_sink_errors_total but does not fail the item.
+    """
+
+    name = "fanout"
+
+    def __init__(self, sinks: Sequence[Sink]) -> None:
+        if not sinks:
+            raise ValueError("FanoutSink needs at least one sink")
+        self.primary = sinks[0]
+        self.mirrors = list(sinks[1:])
+
+    @property
+    def batch_supported(self) -> bool | None:
+        return self.primary.batch_supported
+
+    async def save_news(self, payload: Payload) -> bool | None:
+        result = await self.primary.save_news(payload)
+        if result:
+            await self._mirror([payload])
+        return result
+
+    async def save_news_batch(self, payloads: List[Payload]) -> List[bool | None]:
+        results = await self.primary.save_news_batch(payloads)
+        stored = [payload for payload, result in zip(payloads, results) if result]
+        if stored:
+            await self._mirror(stored)
+        return results
+
+    async def _mirror(self, payloads: List[Payload]) -> None:
+        outcomes = await asyncio.gather(
+            *(sink.save_news_batch(payloads) for sink in self.mirrors), return_exceptions=True
+        )
+        for sink, outcome in zip(self.mirrors, outcomes):
+            if isinstance(outcome, BaseException):
+                failed = len(payloads)
+                logger.warning("Sink %s failed: %s", sink.name, outcome)
+            else:
+                failed = sum(1 for result in outcome if result is None)
+            if failed:
+                SINK_ERRORS.inc(failed, sink=sink.name)
+                logger.warning("Sink %s did not store %d of %d items", sink.name, failed, len(payloads))
+
+    async def close(self) -> None:
+        for sink in [self.primary, *self.mirrors]:
+            try:
+                await sink.close()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Closing sink %s failed: %s", sink.name, exc)
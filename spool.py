@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import metrics
+from core.models import NewsItem
+from core.serialization import Payload, dumps, loads
+from seen_index import SeenIndex, item_fingerprint, item_keys
+from sinks import Sink
+
+logger = logging.getLogger(__name__)
+
+# Rewrite the log once this many resolved records pile up behind live ones.
+COMPACT_AFTER_RESOLVED = 1000
+
+
+@dataclass
+class SpoolEntry:
+    id: str
+    source: str
+    keys: List[str]
+    date: float  # publication timestamp, replay goes newest first
+    payload: Dict[str, Any]
+
+
+def _read_log(path: Path) -> Tuple[Dict[str, SpoolEntry], int]:
+    """Pending entries of a spool log and the number of resolved records in it."""
+    entries: Dict[str, SpoolEntry] = {}
+    resolved = 0
+    if not path.exists():
+        return entries, resolved
+    with path.open("rb") as f:
+        for line in f:
+            try:
+                record = loads(line)
+                if record["op"] == "add":
+                    entry = SpoolEntry(**record["entry"])
+                    entries[entry.id] = entry
+                elif record["op"] == "done":
+                    entries.pop(record["id"], None)
+                    resolved += 1
+            except Exception:  # noqa: BLE001
+                # torn last line after a crash
+                logger.warning("Skipping unreadable spool record in %s", path)
+    return entries, resolved
+
+
+class OutboundSpool:
+    """
+    Append-only on-disk spool of payloads the backend failed to accept
+    (transport errors, 5xx). Each line is an `add` or `done` record; the
+    pending set is rebuilt from the log on start and the log is rewritten
+    once it is mostly resolved records.
+
+    While an item waits here, delivery skips it instead of fetching or
+    sending it again; `replay` sends the spool in bulk, per source and
+    newest first, keeping the created=false stop.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._entries: Dict[str, SpoolEntry] = {}
+        self._keys: Dict[str, str] = {}
+        self._resolved = 0
+        self._load()
+        self._file = self.path.open("ab")
+        # a fresh mtime tells other workers the log is in use (see adopt)
+        os.utime(self.path)
+
+    def _load(self) -> None:
+        entries, self._resolved = _read_log(self.path)
+        for entry in entries.values():
+            self._index(entry)
+        if self._entries:
+            logger.info("Outbound spool has %d pending items", len(self._entries))
+
+    def adopt(self, path: Path) -> int:
+        """Take over the pending entries of another spool log; returns how many were new here."""
+        entries, _ = _read_log(path)
+        fresh = [entry for entry in entries.values() if entry.id not in self._entries]
+        for entry in fresh:
+            self._index(entry)
+        if fresh:
+            self._append([{"op": "add", "entry": entry.__dict__} for entry in fresh])
+        return len(fresh)
+
+    def _index(self, entry: SpoolEntry) -> None:
+        self._entries[entry.id] = entry
+        for key in entry.keys:
+            self._keys[key] = entry.id
+
+    def _forget(self, entry_id: str) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is not None:
+            for key in entry.keys:
+                self._keys.pop(key, None)
+
+    def _append(self, records: List[Dict[str, Any]]) -> None:
+        self._file.write(b"".join(dumps(record) + b"\n" for record in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def contains(self, item: NewsItem) -> bool:
+        return any(key in self._keys for key in item_keys(item))
+
+    def add_many(self, failed: Sequence[Tuple[NewsItem, Payload]]) -> None:
+        records = []
+        for item, payload in failed:
+            if self.contains(item):
+                continue
+            entry = SpoolEntry(
+                id=item_fingerprint(item),
+                source=item.source_name,
+                keys=item_keys(item),
+                date=item.date.timestamp(),
+                payload=loads(payload) if isinstance(payload, bytes) else payload,
+            )
+            self._index(entry)
+            records.append({"op": "add", "entry": entry.__dict__})
+        if records:
+            self._append(records)
+
+    def resolve(self, entry_ids: Sequence[str]) -> None:
+        entry_ids = [entry_id for entry_id in entry_ids if entry_id in self._entries]
+        if not entry_ids:
+            return
+        for entry_id in entry_ids:
+            self._forget(entry_id)
+        self._append([{"op": "done", "id": entry_id} for entry_id in entry_ids])
+        self._resolved += len(entry_ids)
+        if not self._entries or self._resolved >= COMPACT_AFTER_RESOLVED:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the log with only the pending entries."""
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp.open("wb") as f:
+            for entry in self._entries.values():
+                f.write(dumps({"op": "add", "entry": entry.__dict__}) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp, self.path)
+        self._file = self.path.open("ab")
+        self._resolved = 0
+
+    def by_source(self) -> Dict[str, List[SpoolEntry]]:
+        grouped: Dict[str, List[SpoolEntry]] = {}
+        for entry in self._entries.values():
+            grouped.setdefault(entry.source, []).append(entry)
+        for entries in grouped.values():
+            entries.sort(key=lambda entry: entry.date, reverse=True)
+        return grouped
+
+    async def replay(self, client: Sink, seen_index: Optional[SeenIndex], batch_size: int) -> int:
+        """
+        Send pending items, newest first per source. A source stops at the first
+        error (the backend is still failing; the rest stays spooled) or at the
+        first created=false (the backend has everything older; the rest is dropped).
+        Returns the number of entries resolved.
+        """
+        resolved = 0
+        for source, entries in self.by_source().items():
+            index = 0
+            while index < len(entries):
+                chunk = entries[index : index + max(1, batch_size)]
+                payloads = [entry.payload for entry in chunk]
+                if len(chunk) > 1:
+                    results = await client.save_news_batch(payloads)
+                else:
+                    results = [await client.save_news(payloads[0])]
+                done: List[str] = []
+                outcome: Optional[bool] = True
+                for entry, result in zip(chunk, results):
+                    if result is None:
+                        outcome = None
+                        break
+                    metrics.record_result(source, result)
+                    if seen_index is not None:
+                        seen_index.mark_keys(entry.keys, source)
+                    done.append(entry.id)
+                    if result is False:
+                        outcome = False
+                        break
+                if outcome is False:
+                    dropped = [entry.id for entry in entries[index + len(done) :]]
+                    if dropped:
+                        logger.info(
+                            "Spool replay for %s hit created=false, dropping %d older items", source, len(dropped)
+                        )
+                    done.extend(dropped)
+                self.resolve(done)
+                resolved += len(done)
+                if outcome is None:
+                    logger.info(
+                        "Backend still failing, %d items of %s stay spooled", len(entries) - index - len(done), source
+                    )
+                    return resolved
+                if outcome is False:
+                    break
+                index += len(chunk)
+        if resolved:
+            logger.info("Replayed %d spooled items, %d still pending", resolved, len(self))
+        return resolved
+
+    def close(self) -> None:
+        self._file.close()
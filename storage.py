@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent
+DEFAULT_STATE_DIR = ROOT_DIR / ".state"
+
+
+def state_dir() -> Path:
+    """Directory holding the parser's local persistent state (caches, indexes)."""
+    path = Path(os.getenv("STATE_DIR") or DEFAULT_STATE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def state_path(filename: str) -> Path:
+    return state_dir() / filename
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """
+    Open a SQLite database for parser state.
+
+    WAL mode and a busy timeout let several parser processes share one file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The parser is a set of flat top-level modules run from the repository root.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Tuple
+from urllib.parse import urlsplit
+
+import pytest
+
+from backend_client import BackendClient
+from context import ParserContext
+from core.models import NewsItem, SourceConfig
+from core.serialization import encode_payload
+from main import deliver_items
+
+SINGLE = "/test/save_news"
+BATCH = "/test/save_news_batch"
+
+
+@dataclass
+class StubResponse:
+    status_code: int
+    content: bytes
+
+
+class StubBackend:
+    """
+    Stands in for the HTTP transport and answers like the backend: a title
+    it already has is created=false. Records every request it gets.
+    """
+
+    def __init__(self, known: Iterable[str] = (), batch_status: int = 200) -> None:
+        self.known = set(known)
+        self.batch_status = batch_status
+        self.requests: List[Tuple[str, List[str]]] = []
+
+    def _save(self, payload: dict) -> bool:
+        if payload["title"] in self.known:
+            return False
+        self.known.add(payload["title"])
+        return True
+
+    async def post(self, url: str, content: bytes, headers=None, timeout=None) -> StubResponse:
+        path = urlsplit(url).path
+        data = json.loads(content)
+        if path == BATCH:
+            self.requests.append((path, [payload["title"] for payload in data]))
+            if self.batch_status != 200:
+                return StubResponse(self.batch_status, b"")
+            results = [{"created": self._save(payload)} for payload in data]
+            return StubResponse(200, json.dumps({"results": results}).encode())
+        self.requests.append((path, [data["title"]]))
+        return StubResponse(200, json.dumps({"created": self._save(data)}).encode())
+
+    def sent(self) -> List[str]:
+        return [title for _, titles in self.requests for title in titles]
+
+
+def make_items(count: int) -> List[NewsItem]:
+    """`count` items, newest first, titled n0 (newest) .. n<count-1>."""
+    newest = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        NewsItem(
+            header=f"n{i}",
+            text="body",
+            date=newest - timedelta(minutes=i),
+            hashtags=[],
+            source_name="src",
+            url=f"https://example.com/{i}",
+            image_urls=[],
+        )
+        for i in range(count)
+    ]
+
+
+def make_client(backend: StubBackend, batch: bool = True) -> BackendClient:
+    return BackendClient(
+        base_url="http://backend", transport=backend, batch_endpoint=BATCH if batch else None
+    )
+
+
+def test_batch_endpoint_answers_per_item():
+    backend = StubBackend(known={"n1"})
+    client = make_client(backend)
+    payloads = [encode_payload(item) for item in make_items(3)]
+
+    results = asyncio.run(client.save_news_batch(payloads))
+
+    assert results == [True, False, True]
+    assert backend.requests == [(BATCH, ["n0", "n1", "n2"])]
+    assert client.batch_supported is True
+
+
+@pytest.mark.parametrize("status", [404, 405])
+def test_missing_batch_endpoint_falls_back_to_single_posts(status):
+    backend = StubBackend(known={"n1"}, batch_status=status)
+    client = make_client(backend)
+    payloads = [encode_payload(item) for item in make_items(3)]
+
+    results = asyncio.run(client.save_news_batch(payloads))
+
+    # single posts stop after the first created=false: n2 is never sent
+    assert results == [True, False]
+    assert backend.requests == [(BATCH, ["n0", "n1", "n2"]), (SINGLE, ["n0"]), (SINGLE, ["n1"])]
+    assert client.batch_supported is False
+
+    backend.requests.clear()
+    asyncio.run(client.save_news_batch(payloads[2:]))
+    assert backend.requests == [(SINGLE, ["n2"])]
+
+
+def run_delivery(backend: StubBackend, items: List[NewsItem], batch: bool, batch_size: int, window: int):
+    cfg = {"backend_batch_size": batch_size, "backend_inflight_window": window}
+    source = SourceConfig(name="src", rss_url="https://example.com/rss")
+    return asyncio.run(deliver_items(source, items, make_client(backend, batch), cfg, ParserContext()))
+
+
+def test_delivery_stops_at_first_existing_item():
+    backend = StubBackend(known={"n3"})
+
+    stats = run_delivery(backend, make_items(8), batch=False, batch_size=5, window=1)
+
+    assert backend.sent() == ["n0", "n1", "n2", "n3"]
+    assert all(path == SINGLE for path, _ in backend.requests)
+    assert (stats.created, stats.duplicates, stats.errors) == (3, 1, 0)
+
+
+def test_batched_delivery_sends_nothing_after_the_batch_with_the_existing_item():
+    backend = StubBackend(known={"n2"})
+
+    stats = run_delivery(backend, make_items(10), batch=True, batch_size=3, window=1)
+
+    # the newest item goes alone, then batches of three
+    assert backend.requests == [(SINGLE, ["n0"]), (BATCH, ["n1", "n2", "n3"])]
+    # n3 shared the request with the existing item, so the backend stored it
+    assert (stats.created, stats.duplicates) == (3, 1)
+
+
+def test_answers_sent_ahead_of_the_stop_are_discarded():
+    backend = StubBackend(known={"n2"})
+
+    stats = run_delivery(backend, make_items(12), batch=True, batch_size=3, window=3)
+
+    # after the first answer up to three batches go out before their answers
+    assert backend.requests[:2] == [(SINGLE, ["n0"]), (BATCH, ["n1", "n2", "n3"])]
+    assert "n4" in backend.sent()
+    # only the answers up to the created=false one count
+    assert (stats.created, stats.duplicates, stats.errors) == (3, 1, 0)